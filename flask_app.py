@@ -1,10 +1,37 @@
 # flask_app.py
-from flask import Flask, render_template_string, send_from_directory, abort, jsonify, request, Response
+import click
+from flask import Flask, render_template, send_from_directory, abort, request, Response, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
 import os
 import io
 import csv
 import json
 import re
+import html
+import hashlib
+import itertools
+import gzip
+import gc
+import marshal
+import mmap
+import struct
+import sys
+import threading
+import time
+import ctypes
+import ctypes.util
+import errno
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import nullcontext
+from html.parser import HTMLParser
+
+try:
+    import brotli  # optional: enables br-encoded JSON responses
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 BASE_DIR = os.environ.get('STUDY_BASE_DIR') or ('/home/clep/mysite' if os.path.isdir('/home/clep/mysite') else os.path.dirname(os.path.abspath(__file__)))
@@ -12,23 +39,1084 @@ BASE_DIR = os.environ.get('STUDY_BASE_DIR') or ('/home/clep/mysite' if os.path.i
 # -----------------------------
 # Helpers
 # -----------------------------
-def resolve_subject_dir(subject: str):
-    raw = (subject or "").strip()
-    candidates = [
-        raw,
-        raw.lower(),
-        raw.replace(" ", "_"),
-        raw.lower().replace(" ", "_"),
-    ]
+def fold_subject_slug(name: str):
+    # "Human Growth And Development", "human_growth_and_development" and
+    # "HUMAN GROWTH and development" all fold to the same key.
+    return re.sub(r"[\s_]+", "_", (name or "").strip().lower())
+
+
+def find_subject(subject: str):
+    """Catalog entry for a URL slug (exact folder name first, then folded), or None."""
+    with timed("resolve"):
+        catalog = get_catalog()
+        raw = (subject or "").strip()
+        hit = catalog["subjects"].get(raw)
+        if hit is None:
+            hit = catalog["slugs"].get(fold_subject_slug(raw))
+        return hit
+
+
+def require_subject(subject: str):
+    """(slug, dir) of a catalogued subject, or 404."""
+    hit = find_subject(subject)
+    if hit is None:
+        abort(404)
+    return hit["name"], hit["path"]
+
+
+# -------- Loader caches --------
+# Every parsed-content cache is a LoaderCache: entries are validated against the
+# source's mtime, and a missing or stale entry is built by exactly one thread while
+# concurrent requests for the same key wait for that result (single-flight), so a
+# burst of requests right after a file is saved parses it once.
+# With STUDY_MAX_STALE > 0 (seconds), an entry whose file changed less than that long
+# ago keeps being served while a background thread reparses it and swaps the new
+# value in; only older changes (or a first load) are parsed in the request.
+# Entries are sized approximately and kept in LRU order. STUDY_CACHE_MB caps the
+# total of all caches together: past it, the least recently used entry across every
+# cache is evicted first. STUDY_<NAME>_CACHE_MB (e.g. STUDY_QUIZ_CACHE_MB) adds an
+# optional cap for a single cache. 0 or unset means no cap. cache_stats() reports
+# hits, misses, evictions and build time per cache.
+
+_MAX_STALE = float(os.environ.get("STUDY_MAX_STALE", "0") or 0)
+_LOADER_CACHES = {}  # name -> LoaderCache
+_LRU_TICKS = itertools.count()  # global recency clock shared by all caches
+_TOTAL_BUDGET_LOCK = threading.Lock()  # one cross-cache evictor at a time
+
+
+def _megabytes(var: str) -> int:
+    return int(float(os.environ.get(var) or 0) * 1024 * 1024)
+
+
+_TOTAL_CACHE_BUDGET = _megabytes("STUDY_CACHE_MB")
+
+
+def _cache_budget(name: str) -> int:
+    return _megabytes(f"STUDY_{name.upper()}_CACHE_MB")
+
+
+def cached_bytes() -> int:
+    return sum(c._bytes for c in list(_LOADER_CACHES.values()))
+
+
+def _enforce_total_budget():
+    """Evict the globally least recently used entries until all caches fit STUDY_CACHE_MB."""
+    if not _TOTAL_CACHE_BUDGET or cached_bytes() <= _TOTAL_CACHE_BUDGET:
+        return
+    # Never called with a cache lock held; each cache's lock is taken on its own below.
+    with _TOTAL_BUDGET_LOCK:
+        while cached_bytes() > _TOTAL_CACHE_BUDGET:
+            caches = [c for c in list(_LOADER_CACHES.values()) if c._entries]
+            if sum(len(c._entries) for c in caches) <= 1:
+                return  # the entry just stored always stays
+            victim = min(caches, key=lambda c: c._oldest_tick())
+            if not victim._evict_oldest():
+                return
+
+
+def approx_size(obj) -> int:
+    """Rough deep size in bytes of parsed content (dicts, lists, tuples, scalars)."""
     seen = set()
-    for cand in candidates:
-        if not cand or cand in seen:
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
             continue
-        seen.add(cand)
-        p = os.path.join(BASE_DIR, cand)
-        if os.path.isdir(p):
-            return cand, p
-    return raw, os.path.join(BASE_DIR, raw)
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+    return total
+
+
+class _Flight:
+    __slots__ = ("mtime", "done", "value", "error")
+
+    def __init__(self, mtime):
+        self.mtime = mtime
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LoaderCache:
+    def __init__(self, name: str, budget: int = None, max_entries: int = 0):
+        self.name = name
+        self.budget = _cache_budget(name) if budget is None else budget
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> entry, least recently used first
+        self._sizes = {}  # key -> approximate bytes
+        self._used = {}  # key -> _LRU_TICKS value at the last store or hit
+        self._bytes = 0
+        self._flights = {}
+        self._failed = {}  # key -> mtime whose background rebuild raised
+        self._lock = threading.Lock()
+        # Counters are bumped without the lock on the hit path, so they are
+        # approximate under heavy contention.
+        self.hits = self.stale_hits = self.misses = self.evictions = 0
+        self.builds = self.build_errors = 0
+        self.build_seconds = 0.0
+        _LOADER_CACHES[name] = self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        return list(self._entries)
+
+    def peek(self, key):
+        return self._entries.get(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._used.clear()
+            self._bytes = 0
+            self._failed.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "budget": self.budget,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "builds": self.builds,
+            "build_errors": self.build_errors,
+            "build_seconds": round(self.build_seconds, 6),
+        }
+
+    def _servable_stale(self, entry, mtime) -> bool:
+        if entry is None or _MAX_STALE <= 0 or not isinstance(mtime, (int, float)):
+            return False
+        return time.time() - mtime <= _MAX_STALE
+
+    def _touch(self, key):
+        if self.budget or self.max_entries or _TOTAL_CACHE_BUDGET:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self._used[key] = next(_LRU_TICKS)
+
+    def _oldest_tick(self):
+        try:
+            return self._used.get(next(iter(self._entries)), -1)
+        except (StopIteration, RuntimeError):  # emptied or resized meanwhile
+            return float("inf")
+
+    def _evict_oldest(self) -> bool:
+        with self._lock:
+            if not self._entries:
+                return False
+            old, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(old, 0)
+            self._used.pop(old, None)
+            self.evictions += 1
+            return True
+
+    def get(self, key, mtime, build):
+        """Cached value for key if it was built for `mtime`, else build() it (once)."""
+        with timed("cache"):
+            return self._lookup(key, mtime, build)
+
+    def _lookup(self, key, mtime, build):
+        entry = self._entries.get(key)
+        if entry is not None and entry.get("mtime") == mtime:
+            self.hits += 1
+            self._touch(key)
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.get("mtime") == mtime:
+                self.hits += 1
+                return entry
+            flight = self._flights.get(key)
+            leader = flight is None or flight.mtime != mtime
+            if self._servable_stale(entry, mtime):
+                self.stale_hits += 1
+                if leader and self._failed.get(key) != mtime:
+                    self._flights[key] = flight = _Flight(mtime)
+                    threading.Thread(
+                        target=self._revalidate, args=(key, flight, build),
+                        name=f"revalidate-{self.name}", daemon=True,
+                    ).start()
+                return entry
+            self.misses += 1
+            if leader:
+                flight = self._flights[key] = _Flight(mtime)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        return self._run(key, flight, build)
+
+    def _store(self, key, value, size):
+        # Called with the lock held.
+        self._bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._used[key] = next(_LRU_TICKS)
+        self._failed.pop(key, None)
+        self._evict()
+
+    def _evict(self):
+        # Called with the lock held; the most recently used entry always stays.
+        while len(self._entries) > 1 and (
+            (self.budget and self._bytes > self.budget)
+            or (self.max_entries and len(self._entries) > self.max_entries)
+        ):
+            old, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(old, 0)
+            self._used.pop(old, None)
+            self.evictions += 1
+
+    def charge(self, key, entry, nbytes: int):
+        """Account for `nbytes` added to a cached entry after it was stored (e.g. a compressed body)."""
+        with self._lock:
+            if self._entries.get(key) is entry:
+                self._sizes[key] += nbytes
+                self._bytes += nbytes
+                self._entries.move_to_end(key)
+                self._used[key] = next(_LRU_TICKS)
+                self._evict()
+        _enforce_total_budget()
+
+    def _run(self, key, flight, build):
+        started = time.perf_counter()
+        try:
+            flight.value = build()
+            elapsed = time.perf_counter() - started
+            size = approx_size(flight.value)
+            with self._lock:
+                self.builds += 1
+                self.build_seconds += elapsed
+                # A build superseded by one for a newer mtime (or already finished
+                # by it) still answers its own waiters but must not replace that entry.
+                if self._flights.get(key) is flight:
+                    self._store(key, flight.value, size)
+            _enforce_total_budget()
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            self.build_errors += 1
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def _revalidate(self, key, flight, build):
+        try:
+            self._run(key, flight, build)
+        except Exception as e:
+            # Keep serving the old entry; once it is older than _MAX_STALE the
+            # rebuild happens in a request again and the error surfaces there.
+            with self._lock:
+                self._failed[key] = flight.mtime
+            app.logger.warning("background reparse of %s %r failed: %s", self.name, key, e)
+
+
+def cache_stats() -> dict:
+    return {name: c.stats() for name, c in sorted(_LOADER_CACHES.items())}
+
+
+# -------- Metrics --------
+# STUDY_METRICS=1 turns on request and parser instrumentation and serves it at
+# /metrics in the Prometheus text format. When it is off no request hooks are
+# registered, parsers are called directly and /metrics is a 404.
+
+_METRICS_ENABLED = os.environ.get("STUDY_METRICS", "") not in ("", "0")
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_METRICS_LOCK = threading.Lock()
+_METRICS = {
+    "requests": {},  # (method, route, status) -> count
+    "latency": {},  # (method, route) -> Histogram
+    "size": {},  # (method, route) -> Histogram
+    "parse": {},  # parser name -> Histogram
+    "sidecar_hits": {},  # parser name -> count
+}
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def copy(self):
+        other = Histogram(self.buckets)
+        other.counts = list(self.counts)
+        other.sum = self.sum
+        return other
+
+
+def _observe(table: str, key, buckets, value):
+    with _METRICS_LOCK:
+        hist = _METRICS[table].get(key)
+        if hist is None:
+            hist = _METRICS[table][key] = Histogram(buckets)
+        hist.observe(value)
+
+
+def run_parser(parse, path):
+    """parse(path), timed per parser when metrics are on."""
+    with timed("parse"):
+        if not _METRICS_ENABLED:
+            return parse(path)
+        started = time.perf_counter()
+        try:
+            return parse(path)
+        finally:
+            _observe("parse", parse.__name__, _LATENCY_BUCKETS, time.perf_counter() - started)
+
+
+def count_sidecar_hit(parse):
+    if _METRICS_ENABLED:
+        with _METRICS_LOCK:
+            hits = _METRICS["sidecar_hits"]
+            hits[parse.__name__] = hits.get(parse.__name__, 0) + 1
+
+
+def _metrics_start():
+    g.metrics_started = time.perf_counter()
+
+
+def _metrics_record(response):
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    key = (request.method, route)
+    with _METRICS_LOCK:
+        counts = _METRICS["requests"]
+        ckey = key + (str(response.status_code),)
+        counts[ckey] = counts.get(ckey, 0) + 1
+    _observe("latency", key, _LATENCY_BUCKETS, elapsed)
+    if response.content_length is not None:
+        _observe("size", key, _SIZE_BUCKETS, response.content_length)
+    return response
+
+
+if _METRICS_ENABLED:
+    app.before_request(_metrics_start)
+    app.after_request(_metrics_record)
+
+
+def _label_value(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items())
+
+
+def _histogram_lines(name: str, hist: Histogram, labels: str):
+    sep = "," if labels else ""
+    running = 0
+    for bound, n in zip(hist.buckets, hist.counts):
+        running += n
+        yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {running}'
+    running += hist.counts[-1]
+    yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {running}'
+    yield f"{name}_sum{{{labels}}} {hist.sum}"
+    yield f"{name}_count{{{labels}}} {running}"
+
+
+def render_metrics() -> str:
+    out = []
+
+    def family(name, kind, help_text):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+
+    with _METRICS_LOCK:
+        requests_ = sorted(_METRICS["requests"].items())
+        sidecar_hits = sorted(_METRICS["sidecar_hits"].items())
+        latency, size, parse = (
+            sorted((k, h.copy()) for k, h in _METRICS[table].items())
+            for table in ("latency", "size", "parse")
+        )
+
+    family("study_http_requests_total", "counter", "Requests by method, route and status.")
+    for (method, route, status), n in requests_:
+        out.append(f"study_http_requests_total{{{_labels(method=method, route=route, status=status)}}} {n}")
+
+    family("study_http_request_duration_seconds", "histogram", "Time spent in the view and request hooks.")
+    for (method, route), h in latency:
+        out.extend(_histogram_lines("study_http_request_duration_seconds", h, _labels(method=method, route=route)))
+
+    family("study_http_response_size_bytes", "histogram", "Response body size, when known up front.")
+    for (method, route), h in size:
+        out.extend(_histogram_lines("study_http_response_size_bytes", h, _labels(method=method, route=route)))
+
+    family("study_parse_duration_seconds", "histogram", "Time spent parsing a source file, per parser.")
+    for parser, h in parse:
+        out.extend(_histogram_lines("study_parse_duration_seconds", h, _labels(parser=parser)))
+
+    family("study_parse_sidecar_hits_total", "counter", "Parses skipped because the sidecar was current.")
+    for parser, n in sidecar_hits:
+        out.append(f"study_parse_sidecar_hits_total{{{_labels(parser=parser)}}} {n}")
+
+    stats = cache_stats()
+    for field, name, kind, help_text in (
+        ("hits", "study_loader_cache_hits_total", "counter", "Lookups answered from a current entry."),
+        ("stale_hits", "study_loader_cache_stale_hits_total", "counter", "Lookups answered from a stale entry while it is rebuilt."),
+        ("misses", "study_loader_cache_misses_total", "counter", "Lookups that had to build the entry."),
+        ("evictions", "study_loader_cache_evictions_total", "counter", "Entries dropped to stay within the cache budget."),
+        ("builds", "study_loader_builds_total", "counter", "Completed loader builds."),
+        ("build_errors", "study_loader_build_errors_total", "counter", "Loader builds that raised."),
+        ("build_seconds", "study_loader_build_seconds_total", "counter", "Total time spent in loader builds."),
+        ("entries", "study_loader_cache_entries", "gauge", "Entries currently cached."),
+        ("bytes", "study_loader_cache_bytes", "gauge", "Approximate size of the cached entries."),
+        ("budget", "study_loader_cache_budget_bytes", "gauge", "Configured byte budget, 0 for unbounded."),
+    ):
+        family(name, kind, help_text)
+        for cache, st in stats.items():
+            out.append(f"{name}{{{_labels(cache=cache)}}} {st[field]}")
+
+    family("study_loader_cache_hit_ratio", "gauge", "hits / (hits + stale_hits + misses) since start.")
+    for cache, st in stats.items():
+        lookups = st["hits"] + st["stale_hits"] + st["misses"]
+        out.append(f"study_loader_cache_hit_ratio{{{_labels(cache=cache)}}} {st['hits'] / lookups if lookups else 0}")
+
+    family("study_cache_total_bytes", "gauge", "Approximate size of all cached entries together.")
+    out.append(f"study_cache_total_bytes {cached_bytes()}")
+    family("study_cache_total_budget_bytes", "gauge", "STUDY_CACHE_MB shared by all caches, 0 for no cap.")
+    out.append(f"study_cache_total_budget_bytes {_TOTAL_CACHE_BUDGET}")
+
+    return "\n".join(out) + "\n"
+
+
+# -------- Server-Timing --------
+# STUDY_SERVER_TIMING=1 (or true) adds a Server-Timing header to every response;
+# STUDY_SERVER_TIMING=header adds it only to requests sent with "X-Server-Timing: 1".
+# Phases overlap the way the code nests: "cache" includes any "sidecar" read or
+# "parse" it triggers, and "total" covers the whole view.
+
+_SERVER_TIMING_MODE = {"1": "always", "true": "always", "header": "header"}.get(
+    os.environ.get("STUDY_SERVER_TIMING", "").strip().lower()
+)  # anything else is off
+_SERVER_TIMING_PHASES = {  # phase -> description shown in devtools
+    "resolve": "subject lookup",
+    "cache": "loader caches",
+    "sidecar": "parse cache read",
+    "parse": "parse source",
+    "serialize": "JSON encode",
+    "compress": "gzip/br",
+    "send": "file send",
+    "total": "view",
+}
+_UNTIMED = nullcontext()
+
+
+class _TimedPhase:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        # A phase nested in itself (a loader calling another loader) counts once.
+        if self.name not in self.timings["active"]:
+            self.timings["active"].add(self.name)
+            self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        if self.started is not None:
+            self.timings["active"].discard(self.name)
+            durations = self.timings["durations"]
+            durations[self.name] = durations.get(self.name, 0.0) + time.perf_counter() - self.started
+        return False
+
+
+def timed(phase: str):
+    """Context manager adding its duration to the request's Server-Timing `phase`."""
+    if _SERVER_TIMING_MODE is None or not has_request_context():
+        return _UNTIMED
+    timings = g.get("server_timing")
+    if timings is None:
+        return _UNTIMED
+    return _TimedPhase(timings, phase)
+
+
+def _server_timing_start():
+    if _SERVER_TIMING_MODE == "always" or request.headers.get("X-Server-Timing") == "1":
+        g.server_timing = {"durations": {}, "active": set(), "started": time.perf_counter()}
+
+
+def _server_timing_header(response):
+    timings = g.pop("server_timing", None)
+    if timings is None:
+        return response
+    durations = dict(timings["durations"], total=time.perf_counter() - timings["started"])
+    response.headers["Server-Timing"] = ", ".join(
+        f'{name};desc="{_SERVER_TIMING_PHASES[name]}";dur={durations[name] * 1000:.3f}'
+        for name in _SERVER_TIMING_PHASES
+        if name in durations
+    )
+    return response
+
+
+if _SERVER_TIMING_MODE is not None:
+    app.before_request(_server_timing_start)
+    app.after_request(_server_timing_header)
+
+
+def send_timed(directory: str, path: str):
+    with timed("send"):
+        return send_from_directory(directory, path)
+
+
+# -------- Subject catalog --------
+# BASE_DIR is scanned once into memory: every subject folder with the study files it
+# provides. Routes resolve subjects and file paths from here instead of probing the
+# disk per request. On Linux an inotify watch marks the catalog dirty when entries
+# are created, deleted or renamed; elsewhere it is rescanned every
+# STUDY_CATALOG_POLL seconds. File contents are still validated by mtime in the loaders.
+
+_SUBJECT_ARTIFACTS = {  # kind -> candidate paths relative to the subject folder, first match wins
+    "guide": ("guide.html",),
+    "slides": ("slides.pdf",),
+    "mindmap": ("mindmap.md", "markmap.md"),
+    "flashcards": ("flashcards/flashcards.csv", "flashcards.csv"),
+    "quiz": ("quiz/quiz.csv", "quiz.csv"),
+    "resources": ("resources/resources.json", "resources.json"),
+    "images": ("images/",),
+}
+_CATALOG_SKIP = ("__pycache__", "static")
+_CATALOG_POLL_SECONDS = float(os.environ.get("STUDY_CATALOG_POLL", "2"))
+
+_CATALOG = {"pack": None, "dirty": True, "scanned_at": 0.0, "pid": None, "watcher": None}
+_CATALOG_LOCK = threading.Lock()
+
+
+def _dir_entries(path: str):
+    try:
+        with os.scandir(path) as it:
+            return {e.name: e.is_dir() for e in it}
+    except OSError:
+        return {}
+
+
+def _scan_subject(path: str):
+    listings = {"": _dir_entries(path)}
+    artifacts = {}
+    for kind, rels in _SUBJECT_ARTIFACTS.items():
+        for rel in rels:
+            want_dir = rel.endswith("/")
+            folder, _, name = rel.rstrip("/").rpartition("/")
+            if folder not in listings:
+                listings[folder] = _dir_entries(os.path.join(path, folder)) if listings[""].get(folder) else {}
+            if listings[folder].get(name) is want_dir:
+                artifacts[kind] = os.path.join(path, rel.rstrip("/"))
+                break
+    # Every candidate folder that exists, empty or not, so a file added to it later is seen.
+    watch_dirs = [os.path.join(path, d) for d in listings if d and listings[""].get(d)]
+    return artifacts, watch_dirs
+
+
+def scan_catalog():
+    subjects = {}
+    watch_dirs = [BASE_DIR]
+    for name, is_dir in sorted(_dir_entries(BASE_DIR).items()):
+        if not is_dir or name.startswith(".") or name in _CATALOG_SKIP:
+            continue
+        path = os.path.join(BASE_DIR, name)
+        artifacts, subdirs = _scan_subject(path)
+        subjects[name] = {"name": name, "path": path, "artifacts": artifacts}
+        watch_dirs.append(path)
+        watch_dirs.extend(subdirs)
+    # Folded slug -> entry; a folder already named in folded form wins a collision.
+    slugs = {}
+    for name, entry in subjects.items():
+        key = fold_subject_slug(name)
+        if key not in slugs or name == key:
+            slugs[key] = entry
+
+    return {
+        "subjects": subjects,
+        "slugs": slugs,
+        "by_path": {s["path"]: s for s in subjects.values()},
+        "books": [name for name, s in subjects.items() if "guide" in s["artifacts"]],
+        "watch_dirs": watch_dirs,
+    }
+
+
+class _InotifyWatcher:
+    """Marks the catalog dirty on any create/delete/rename in the watched folders."""
+
+    _MASK = 0x40 | 0x80 | 0x100 | 0x200 | 0x400 | 0x800 | 0x01000000  # MOVED_FROM/TO, CREATE, DELETE, DELETE/MOVE_SELF, ONLYDIR
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        threading.Thread(target=self._run, name="catalog-inotify", daemon=True).start()
+
+    def watch(self, path: str):
+        # Re-adding an already watched folder is a no-op for the kernel.
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(path), self._MASK) < 0:
+            err = ctypes.get_errno()
+            if err != errno.ENOENT:  # removed since the scan; the parent's watch covers that
+                raise OSError(err, f"inotify_add_watch failed for {path}")
+
+    def _run(self):
+        while True:
+            try:
+                os.read(self._fd, 64 * 1024)
+            except OSError:
+                return
+            _CATALOG["dirty"] = True
+
+
+def _start_catalog_watcher():
+    # Runs once per process, so forked workers each get their own watch.
+    _CATALOG["pid"] = os.getpid()
+    _CATALOG["dirty"] = True
+    try:
+        _CATALOG["watcher"] = _InotifyWatcher()
+    except (OSError, AttributeError):
+        _CATALOG["watcher"] = None  # no inotify: fall back to polling
+
+
+def _catalog_stale():
+    cat = _CATALOG
+    if cat["dirty"] or cat["pack"] is None:
+        return True
+    return cat["watcher"] is None and time.monotonic() - cat["scanned_at"] >= _CATALOG_POLL_SECONDS
+
+
+def get_catalog():
+    cat = _CATALOG
+    if cat["pid"] != os.getpid():
+        with _CATALOG_LOCK:
+            if cat["pid"] != os.getpid():
+                _start_catalog_watcher()
+
+    if _catalog_stale():
+        with _CATALOG_LOCK:
+            if _catalog_stale():
+                cat["dirty"] = False  # events arriving during the scan mark it dirty again
+                pack = scan_catalog()
+                if cat["watcher"] is not None:
+                    try:
+                        for path in pack["watch_dirs"]:
+                            cat["watcher"].watch(path)
+                    except OSError as e:
+                        # Out of watches (ENOSPC) or no permission: poll instead.
+                        app.logger.warning("catalog watch failed, polling every %ss: %s", _CATALOG_POLL_SECONDS, e)
+                        cat["watcher"] = None
+                cat["pack"] = pack
+                cat["scanned_at"] = time.monotonic()
+    return cat["pack"]
+
+
+def _find_artifact(subject_dir: str, kind: str):
+    for rel in _SUBJECT_ARTIFACTS[kind]:
+        path = os.path.join(subject_dir, rel.rstrip("/"))
+        if os.path.isdir(path) if rel.endswith("/") else os.path.isfile(path):
+            return path
+    return None
+
+
+def subject_artifact(subject_dir: str, kind: str):
+    """Path of a subject's guide/quiz/flashcards/... file, or None if it has none."""
+    subject = get_catalog()["by_path"].get(subject_dir)
+    if subject is None:
+        # Not a catalogued subject folder: look on disk.
+        return _find_artifact(subject_dir, kind)
+    return subject["artifacts"].get(kind)
+
+
+# -------- Persistent parse cache --------
+# The in-memory caches start empty in every new worker. Parsed results are also kept
+# as marshal sidecars under STUDY_CACHE_DIR (default <BASE_DIR>/.parse_cache; set it
+# empty to disable), so a restarted worker reloads them instead of parsing again.
+
+_PARSE_CACHE_DIR = os.environ.get("STUDY_CACHE_DIR", os.path.join(BASE_DIR, ".parse_cache"))
+_PARSE_CACHE_VERSION = 2  # bump whenever a parser's output changes
+
+
+def _sidecar_path(kind: str, path: str):
+    digest = hashlib.sha1(f"{kind}\0{os.path.abspath(path)}".encode("utf-8")).hexdigest()[:20]
+    return os.path.join(_PARSE_CACHE_DIR, f"{kind}-{digest}.marshal")
+
+
+def load_parsed(kind: str, path: str, parse):
+    """
+    parse(path), reused from the sidecar when it was written for the same source
+    path, size, mtime, parser version and Python version. Unreadable or stale
+    sidecars just mean parsing again; write failures are ignored.
+    """
+    if not _PARSE_CACHE_DIR:
+        return run_parser(parse, path)
+
+    st = os.stat(path)
+    stamp = (_PARSE_CACHE_VERSION, tuple(sys.version_info[:2]), kind, os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    sidecar = _sidecar_path(kind, path)
+    try:
+        with timed("sidecar"), open(sidecar, "rb") as f:
+            stored_stamp, data = marshal.load(f)
+        if stored_stamp == stamp:
+            count_sidecar_hit(parse)
+            return data
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    data = run_parser(parse, path)
+    try:
+        os.makedirs(_PARSE_CACHE_DIR, exist_ok=True)
+        tmp = f"{sidecar}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            marshal.dump((stamp, data), f)
+        os.replace(tmp, sidecar)
+    except (OSError, ValueError):
+        pass
+    return data
+
+
+# -------- Content bundles --------
+# `flask clep build` stores every loader result for a subject in one marshal file,
+# <STUDY_BUNDLE_DIR>/<subject>.bundle. When STUDY_BUNDLE_DIR is set the loaders below
+# answer from those bundles and never parse. Paths inside a bundle are stored relative
+# to the subject folder, so a bundle built on one machine works under another
+# BASE_DIR. Images, slides and raw downloads are still served from the subject folder.
+
+_BUNDLE_STATE = {"dir": os.environ.get("STUDY_BUNDLE_DIR") or None}
+_BUNDLE_CACHE = LoaderCache("bundle")  # bundle path -> {"mtime": float, "data": {...}}
+_BUNDLE_FORMAT = 2  # bump whenever the bundle payload layout changes
+_BUNDLE_ROOT_MARK = "\0subject\0"
+
+# What a loader returns for a subject that has no bundle.
+_BUNDLE_EMPTY = {
+    "guide": None,
+    "guide_doc": None,
+    "mindmap": None,
+    "datatables": None,
+    "datatable_listing": {"path": None, "mtime": 0.0, "combined": None, "tables": [], "by_id": {}},
+    "tables": {},
+    "flashcards": {"cards": [], "by_module": {}, "modules": []},
+    "quiz": {"items": [], "by_module": {}, "modules": [], "path": None},
+    "resources": {"resources": [], "path": None},
+}
+
+
+def serving_bundles():
+    return bool(_BUNDLE_STATE["dir"] or _STORE_STATE["path"])
+
+
+def _relocate_paths(obj, old: str, new: str):
+    """In place: rewrite every string (and dict key) equal to or under `old` to live under `new`."""
+    def moved(v):
+        if isinstance(v, str) and (v == old or v.startswith(old + os.sep)):
+            return new + v[len(old):]
+        return v
+
+    seen = set()
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        if isinstance(o, dict):
+            for k in [k for k in o if moved(k) is not k]:
+                o[moved(k)] = o.pop(k)
+            items = o.items()
+        elif isinstance(o, list):
+            items = enumerate(o)
+        else:
+            continue
+        for k, v in list(items):
+            if isinstance(v, str):
+                o[k] = moved(v)
+            elif isinstance(v, (dict, list)):
+                stack.append(v)
+
+
+def build_subject_bundle(subject: dict):
+    """Parse everything for one catalogued subject and return the bundle payload."""
+    subject_dir = subject["path"]
+    listing = get_datatable_listing(subject_dir)
+    combined = get_combined_datatables(subject_dir)
+    # Flat tables are only served when there is no combined CSV (see find_flat_datatable).
+    flat = [] if combined and combined.get("tables") else listing["tables"]
+    doc = get_guide_doc(subject_dir)
+    if doc:
+        _encoded_body(doc, "gzip")
+    payload = {
+        "subject": subject["name"],
+        "guide": get_guide_sections(subject_dir),
+        "guide_doc": doc,
+        "mindmap": get_mindmap_tree(subject_dir),
+        "datatables": combined,
+        "datatable_listing": listing,
+        "tables": {t["full"]: get_table_file(t["full"]) for t in flat},
+        "flashcards": get_flashcards(subject_dir),
+        "quiz": get_quiz(subject_dir),
+        "resources": get_resources(subject_dir),
+    }
+    # Work on a copy so the live caches keep their absolute paths.
+    payload = marshal.loads(marshal.dumps(payload))
+    _relocate_paths(payload, subject_dir, _BUNDLE_ROOT_MARK)
+    payload["version"] = hashlib.sha1(marshal.dumps(payload)).hexdigest()[:16]
+    return payload
+
+
+def write_subject_bundle(out_dir: str, payload: dict):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f'{payload["subject"]}.bundle')
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        marshal.dump(((_BUNDLE_FORMAT, tuple(sys.version_info[:2])), payload), f)
+    os.replace(tmp, path)
+    return path
+
+
+def load_bundle(subject_dir: str):
+    subject = get_catalog()["by_path"].get(subject_dir)
+    if subject is None:
+        return None
+    path = os.path.join(_BUNDLE_STATE["dir"], f'{subject["name"]}.bundle')
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    def build():
+        with open(path, "rb") as f:
+            header, data = marshal.load(f)
+        if header != (_BUNDLE_FORMAT, tuple(sys.version_info[:2])):
+            raise RuntimeError(f"{path} was built for another bundle format or Python version; rerun `flask clep build`")
+        _relocate_paths(data, _BUNDLE_ROOT_MARK, subject_dir)
+        return {"mtime": mtime, "data": data}
+
+    return _BUNDLE_CACHE.get(path, mtime, build)["data"]
+
+
+def bundle_part(subject_dir: str, part: str):
+    if _STORE_STATE["path"]:
+        return store_part(subject_dir, part)
+    bundle = load_bundle(subject_dir)
+    if bundle is None:
+        return _BUNDLE_EMPTY[part]
+    return bundle[part]
+
+
+# -------- Memory-mapped content store --------
+# `flask clep store` packs the bundles of every subject into one file. With
+# STUDY_CONTENT_STORE set, each worker maps it read-only, so the kernel shares its pages
+# between processes instead of every worker holding its own parsed copy. A subject's
+# part is decoded on first use; the big record lists (cards, quiz items, guide
+# sections, table rows, search haystacks) stay in the map and are decoded one record
+# per access, the guide document bodies are served as slices of the map and the
+# table sort orders are read in place as packed integer arrays.
+#
+# Layout: magic, u64 offset of the index, records and part blobs, marshal'd index.
+
+_STORE_MAGIC = b"CLEPSTORE1"
+_STORE_HEADER = struct.Struct("<Q")
+_STORE_FORMAT = 2  # bump together with _BUNDLE_FORMAT
+_STORE_RECORDS_MARK = "\0records\0"
+_STORE_BLOB_MARK = "\0blob\0"
+_STORE_ARRAY_MARK = "\0array\0"
+_STORE_STATE = {"path": os.environ.get("STUDY_CONTENT_STORE") or None, "mtime": None, "map": None, "index": None, "parts": {}}
+_STORE_LOCK = threading.Lock()
+
+# Per part: key paths ("*" = every key/item) of the lists stored record by record.
+_STORE_LAZY_PATHS = {
+    "guide": (("sections",),),
+    "flashcards": (("cards",), ("by_module", "*")),
+    "quiz": (("items",), ("by_module", "*")),
+    "datatables": (
+        ("tables", "*", "rows"), ("by_id", "*", "rows"),
+        ("tables", "*", "index", "haystacks"), ("by_id", "*", "index", "haystacks"),
+    ),
+    "tables": (("*", "rows"), ("*", "index", "haystacks")),
+}
+# Per part: key paths of bytes kept in the map (read as memoryviews) and of int
+# lists stored as packed arrays (read as memoryviews cast to unsigned ints).
+_STORE_MAPPED_PATHS = {
+    "guide_doc": (("body",), ("gzip",), ("br",)),
+    "datatables": (("tables", "*", "index", "order", "*"), ("by_id", "*", "index", "order", "*")),
+    "tables": (("*", "index", "order", "*"),),
+}
+
+
+class LazyRecords(Sequence):
+    """Read-only list whose items are marshal records decoded from the store on access."""
+
+    __slots__ = ("_buf", "_offsets")
+
+    def __init__(self, buf, offsets: bytes):
+        self._buf = buf
+        self._offsets = memoryview(offsets).cast("Q")  # n + 1 boundaries
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return marshal.loads(self._buf[self._offsets[i]:self._offsets[i + 1]])
+
+
+class StudyJSONProvider(DefaultJSONProvider):
+    @staticmethod
+    def default(o):
+        if isinstance(o, LazyRecords):
+            return list(o)
+        return DefaultJSONProvider.default(o)
+
+
+app.json = StudyJSONProvider(app)
+
+
+def _store_targets(obj, path):
+    """(container, key) pairs addressed by `path` inside obj."""
+    if not isinstance(obj, (dict, list)):
+        return
+    head, rest = path[0], path[1:]
+    if head == "*":
+        keys = list(obj.keys()) if isinstance(obj, dict) else range(len(obj))
+    else:
+        keys = [head] if isinstance(obj, dict) and head in obj else []
+    for k in keys:
+        if rest:
+            yield from _store_targets(obj[k], rest)
+        else:
+            yield obj, k
+
+
+def write_content_store(path: str, payloads):
+    data = bytearray()
+    start = len(_STORE_MAGIC) + _STORE_HEADER.size
+    subjects = {}
+    for payload in payloads:
+        parts = {}
+        for part, value in payload.items():
+            if part in ("subject", "version"):
+                continue
+            value = marshal.loads(marshal.dumps(value))
+            for lazy_path in _STORE_LAZY_PATHS.get(part, ()):
+                for container, key in list(_store_targets(value, lazy_path)):
+                    records = container[key]
+                    if not isinstance(records, list):
+                        continue  # shared with an earlier path, already stored
+                    bounds = array("Q", [start + len(data)])
+                    for record in records:
+                        data += marshal.dumps(record)
+                        bounds.append(start + len(data))
+                    container[key] = (_STORE_RECORDS_MARK, bounds.tobytes())
+            for mapped_path in _STORE_MAPPED_PATHS.get(part, ()):
+                for container, key in list(_store_targets(value, mapped_path)):
+                    raw = container[key]
+                    if isinstance(raw, bytes):
+                        container[key] = (_STORE_BLOB_MARK, start + len(data), len(raw))
+                        data += raw
+                    elif isinstance(raw, list):
+                        packed = array("I", raw).tobytes()
+                        data += b"\0" * (-(start + len(data)) % 4)  # keep the array aligned
+                        container[key] = (_STORE_ARRAY_MARK, start + len(data), len(packed))
+                        data += packed
+            blob = marshal.dumps(value)
+            parts[part] = (start + len(data), len(blob))
+            data += blob
+        subjects[payload["subject"]] = {"version": payload["version"], "parts": parts}
+
+    index = {"header": (_STORE_FORMAT, tuple(sys.version_info[:2]), sys.byteorder), "subjects": subjects}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_STORE_MAGIC)
+        f.write(_STORE_HEADER.pack(start + len(data)))
+        f.write(data)
+        f.write(marshal.dumps(index))
+    os.replace(tmp, path)
+    return index
+
+
+def _content_store():
+    st = _STORE_STATE
+    mtime = os.path.getmtime(st["path"])
+    if st["mtime"] == mtime:
+        return st
+    with _STORE_LOCK:
+        if st["mtime"] != mtime:
+            with open(st["path"], "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if buf[:len(_STORE_MAGIC)] != _STORE_MAGIC:
+                raise RuntimeError(f'{st["path"]} is not a content store')
+            (index_at,) = _STORE_HEADER.unpack_from(buf, len(_STORE_MAGIC))
+            index = marshal.loads(buf[index_at:])
+            if index["header"] != (_STORE_FORMAT, tuple(sys.version_info[:2]), sys.byteorder):
+                raise RuntimeError(f'{st["path"]} was built for another store format or Python version; rerun `flask clep store`')
+            # Older maps stay alive for as long as records decoded from them are referenced.
+            st.update(map=buf, index=index, parts={}, mtime=mtime)
+    return st
+
+
+def store_part(subject_dir: str, part: str):
+    subject = get_catalog()["by_path"].get(subject_dir)
+    st = _content_store()
+    entry = subject and st["index"]["subjects"].get(subject["name"])
+    if not entry:
+        return _BUNDLE_EMPTY[part]
+
+    parts = st["parts"]
+    key = (subject["name"], part)
+    if key in parts:
+        return parts[key]
+
+    buf = st["map"]
+    off, length = entry["parts"][part]
+    value = marshal.loads(buf[off:off + length])
+    _relocate_paths(value, _BUNDLE_ROOT_MARK, subject_dir)
+    for lazy_path in _STORE_LAZY_PATHS.get(part, ()) + _STORE_MAPPED_PATHS.get(part, ()):
+        for container, k in list(_store_targets(value, lazy_path)):
+            ref = container[k]
+            if not isinstance(ref, tuple) or not ref:
+                continue
+            if ref[0] == _STORE_RECORDS_MARK:
+                container[k] = LazyRecords(buf, ref[1])
+            elif ref[0] == _STORE_BLOB_MARK:
+                container[k] = memoryview(buf)[ref[1]:ref[1] + ref[2]]
+            elif ref[0] == _STORE_ARRAY_MARK:
+                container[k] = memoryview(buf)[ref[1]:ref[1] + ref[2]].cast("I")
+    parts[key] = value
+    return value
 
 
 def _datatable_dirs(subject_dir: str):
@@ -54,7 +1142,7 @@ def _pretty_sheet_name(filename: str):
 # and inside that file each section starts with a "header row" (module title in col1, column names after),
 # the app will expose each section as its own table in the left pane.
 
-_COMBINED_DT_CACHE = {}  # path -> {"mtime": float, "tables": [...], "by_id": {...}}
+_COMBINED_DT_CACHE = LoaderCache("datatables")  # path -> {"mtime": float, "tables": [...], "by_id": {...}}
 
 def _combined_datatable_candidates(subject_dir: str):
     # Flat layout: keep everything inside /home/clep/mysite/<subject>/ (no subfolders)
@@ -193,63 +1281,140 @@ def parse_combined_datatable_csv(full_path: str):
         else:
             vals = vals[:len(current["columns"])]
 
-        row_dict = {current["columns"][i]: (vals[i].strip() if isinstance(vals[i], str) else vals[i]) for i in range(len(current["columns"]))}
+        # rows are kept as value lists in column order (see table_rows_as_dicts)
+        row = [(v.strip() if isinstance(v, str) else v) for v in vals]
         # drop rows that are completely empty
-        any_text = any((v or "").strip() for v in row_dict.values() if isinstance(v, str))
-        any_nontext = any(v for v in row_dict.values() if not isinstance(v, str))
+        any_text = any((v or "").strip() for v in row if isinstance(v, str))
+        any_nontext = any(v for v in row if not isinstance(v, str))
         if any_text or any_nontext:
-            current["rows"].append(row_dict)
+            current["rows"].append(row)
+
+    return tables
+
+def _table_cell_text(v):
+    return "" if v is None else str(v)
+
+
+def table_rows_as_dicts(columns, rows):
+    """Expand column-ordered row lists into the keyed rows of the default wire format."""
+    return [dict(zip(columns, r)) for r in rows]
+
 
+def _table_sort_key(text: str):
+    # Same ordering as the study page used client-side: numbers numerically, else text.
+    s = text.lower()
+    if s.strip():
+        try:
+            num = float(s)
+        except ValueError:
+            num = None
+        if num is not None and num == num:  # NaN compares unequal to itself
+            return (0, num, "")
+    return (1, 0, s)
+
+
+def build_table_index(columns, rows):
+    """
+    Per-table search/sort index: one lower-cased haystack per row and, per column,
+    the ascending row permutation. Built once when the table is parsed.
+    """
+    texts = [[_table_cell_text(v) for v in r] for r in rows]
+    haystacks = ["\x1f".join(cells).lower() for cells in texts]
+    order = {}
+    for ci, c in enumerate(columns):
+        keys = [_table_sort_key(cells[ci]) for cells in texts]
+        order[c] = sorted(range(len(rows)), key=keys.__getitem__)
+    return {"haystacks": haystacks, "order": order}
+
+
+def query_table(columns, rows, index, q="", sort=None, direction="asc", page=1, page_size=25):
+    """Filter (substring, case-insensitive), sort and page a table using its index."""
+    if sort in index["order"]:
+        ids = index["order"][sort]
+        if direction == "desc":
+            ids = ids[::-1]
+    else:
+        ids = range(len(rows))
+
+    q = (q or "").strip().lower()
+    if q:
+        haystacks = index["haystacks"]
+        ids = [i for i in ids if q in haystacks[i]]
+
+    total = len(ids)
+    page_size = max(1, min(int(page_size or 25), 500))
+    pages = max(1, -(-total // page_size))
+    page = max(1, min(int(page or 1), pages))
+    start = (page - 1) * page_size
+    return {
+        "columns": columns,
+        "rows": [rows[i] for i in ids[start:start + page_size]],
+        "total": total,
+        "count": len(rows),
+        "page": page,
+        "pages": pages,
+        "page_size": page_size,
+    }
+
+
+def parse_indexed_datatable_csv(path: str):
+    tables = parse_combined_datatable_csv(path)
+    for t in tables:
+        t["index"] = build_table_index(t["columns"], t["rows"])
     return tables
 
+
 def get_combined_datatables(subject_dir: str):
-    path = next((p for p in _combined_datatable_candidates(subject_dir)), None)
+    if serving_bundles():
+        return bundle_part(subject_dir, "datatables")
+    path = get_datatable_listing(subject_dir)["combined"]
     if not path:
         return None
 
     mtime = os.path.getmtime(path)
-    cached = _COMBINED_DT_CACHE.get(path)
-    if cached and cached.get("mtime") == mtime:
-        return cached
 
-    tables = parse_combined_datatable_csv(path)
-    pack = {
-        "path": path,
-        "mtime": mtime,
-        "tables": tables,
-        "by_id": {t["id"]: t for t in tables},
-    }
-    _COMBINED_DT_CACHE[path] = pack
-    return pack
+    def build():
+        tables = load_parsed("datatables", path, parse_indexed_datatable_csv)
+
+        # Sidebar entries, with display names de-duplicated
+        listing = []
+        used = {}
+        for t in tables:
+            name = t.get("name") or t.get("id")
+            if name in used:
+                used[name] += 1
+                name = f"{name} ({used[name]})"
+            else:
+                used[name] = 1
+            listing.append({"id": t["id"], "name": name, "full": path})
+
+        return {
+            "path": path,
+            "mtime": mtime,
+            "tables": tables,
+            "by_id": {t["id"]: t for t in tables},
+            "listing": listing,
+        }
+
+    return _COMBINED_DT_CACHE.get(path, mtime, build)
 
 def write_table_to_csv_string(table: dict):
     buf = io.StringIO()
     writer = csv.writer(buf)
     writer.writerow(table.get("columns") or [])
-    for r in (table.get("rows") or []):
-        writer.writerow([(r.get(c, "") if isinstance(r, dict) else "") for c in (table.get("columns") or [])])
+    writer.writerows(table.get("rows") or [])
     return buf.getvalue()
 
 
+# -------- Table discovery (validated by the subject directory's mtime) --------
+# Adding, removing or renaming a file bumps the directory mtime, so the scan below
+# only reruns when the set of candidate files can have changed.
 
-def list_datatables(subject_dir: str):
-    # If a combined datatable CSV exists, expose each section as its own table "sheet"
-    combined = get_combined_datatables(subject_dir)
-    if combined and combined.get("tables"):
-        out = []
-        used = {}
-        for t in combined["tables"]:
-            name = t.get("name") or t.get("id")
-            # de-dupe display names
-            if name in used:
-                used[name] += 1
-                name = f"{name} ({used[name]})"
-            else:
-                used[name] = 1
-            out.append({"id": t["id"], "name": name, "full": combined["path"]})
-        return out
+_DT_LISTING_CACHE = LoaderCache("datatable_listing")  # subject_dir -> {"mtime": float, "combined": path|None, "tables": [...], "by_id": {...}}
 
-    # Flat layout fallback: show each CSV/JSON file in the subject root that looks like a table
+
+def _scan_flat_datatables(subject_dir: str):
+    # Flat layout: each CSV/JSON file in the subject root that looks like a table
     results = []
     for fname in sorted(os.listdir(subject_dir)):
         lo = fname.lower()
@@ -278,15 +1443,56 @@ def list_datatables(subject_dir: str):
         out.append({"id": fid, "name": n, "full": full})
     return out
 
+
+def get_datatable_listing(subject_dir: str):
+    if serving_bundles():
+        return bundle_part(subject_dir, "datatable_listing")
+    mtime = os.path.getmtime(subject_dir)
+
+    def build():
+        tables = _scan_flat_datatables(subject_dir)
+        return {
+            "path": subject_dir,
+            "mtime": mtime,
+            "combined": next(iter(_combined_datatable_candidates(subject_dir)), None),
+            "tables": tables,
+            "by_id": {t["id"]: t for t in tables},
+        }
+
+    return _DT_LISTING_CACHE.get(subject_dir, mtime, build)
+
+
+def datatables_from(combined, listing):
+    # If a combined datatable CSV exists, expose each section as its own table "sheet"
+    if combined and combined.get("tables"):
+        return combined["listing"]
+    return listing["tables"]
+
+
+def find_flat_datatable(subject_dir: str, table_id: str):
+    """Listing entry for a per-file table, or None (also when a combined CSV takes precedence)."""
+    combined = get_combined_datatables(subject_dir)
+    if combined and combined.get("tables"):
+        return None
+    return get_datatable_listing(subject_dir)["by_id"].get(table_id)
+
+
+def _json_table_row(r, columns):
+    # JSON tables may hold keyed rows or value lists; both are stored as lists.
+    if isinstance(r, dict):
+        return [r.get(c) for c in columns]
+    return (list(r) + [None] * len(columns))[:len(columns)]
+
+
 def load_table_file(full_path: str):
     lo = full_path.lower()
     if lo.endswith(".csv"):
         with open(full_path, "r", encoding="utf-8-sig", newline="") as f:
             reader = csv.DictReader(f)
+            columns = list(reader.fieldnames or [])
             rows = []
             for r in reader:
-                rows.append({k: (v.strip() if isinstance(v, str) else v) for k, v in r.items()})
-            columns = list(reader.fieldnames or [])
+                rows.append([(v.strip() if isinstance(v, str) else v) for v in map(r.get, columns)])
             return columns, rows
 
     if lo.endswith(".json"):
@@ -296,7 +1502,7 @@ def load_table_file(full_path: str):
             cols = data.get("columns") or []
             rows = data.get("rows") or []
             if isinstance(cols, list) and isinstance(rows, list):
-                return cols, rows
+                return cols, [_json_table_row(r, cols) for r in rows if isinstance(r, (dict, list))]
         if isinstance(data, list):
             rows = [x for x in data if isinstance(x, dict)]
             cols = []
@@ -304,37 +1510,55 @@ def load_table_file(full_path: str):
                 for k in r.keys():
                     if k not in cols:
                         cols.append(k)
-            return cols, rows
+            return cols, [_json_table_row(r, cols) for r in rows]
 
     return [], []
 
 
+_TABLE_FILE_CACHE = LoaderCache("table")  # path -> {"mtime": float, "columns": [...], "rows": [...], "index": {...}}
+
+def parse_indexed_table_file(full_path: str):
+    columns, rows = load_table_file(full_path)
+    return {"columns": columns, "rows": rows, "index": build_table_index(columns, rows)}
+
+
+def get_table_file(full_path: str):
+    if serving_bundles():
+        table = bundle_part(os.path.dirname(full_path), "tables").get(full_path)
+        if table is None:
+            raise FileNotFoundError(full_path)
+        return table
+    mtime = os.path.getmtime(full_path)
+
+    def build():
+        table = load_parsed("table", full_path, parse_indexed_table_file)
+        return {
+            "path": full_path,
+            "mtime": mtime,
+            "columns": table["columns"],
+            "rows": table["rows"],
+            "index": table["index"],
+        }
+
+    return _TABLE_FILE_CACHE.get(full_path, mtime, build)
+
+
 # -------- Flashcards --------
-_FLASHCARDS_CACHE = {}  # (subject, abs_path) -> {"mtime": float, "cards": [...]}
+_FLASHCARDS_CACHE = LoaderCache("flashcards")  # (subject, abs_path) -> {"mtime": float, "cards": [...], "by_module": {...}, "modules": [...]}
 
-def _flashcards_paths(subject_dir: str):
-    return [
-        os.path.join(subject_dir, "flashcards", "flashcards.csv"),
-        os.path.join(subject_dir, "flashcards.csv"),
-    ]
+def _group_by_module(records):
+    by_module = {}
+    for r in records:
+        by_module.setdefault(r["module"], []).append(r)
+    return by_module
 
 
-def load_flashcards(subject_dir: str):
+def parse_flashcards_csv(path: str):
     """
     Expected columns (case-insensitive):
       front, back, Module, CLEP Trap
     """
-    path = next((p for p in _flashcards_paths(subject_dir) if os.path.exists(p)), None)
-    if not path:
-        return []
-    abs_path = os.path.abspath(path)
-    key = (os.path.abspath(subject_dir), abs_path)
-    mtime = os.path.getmtime(abs_path)
-    cached = _FLASHCARDS_CACHE.get(key)
-    if cached and cached.get("mtime") == mtime:
-        return cached.get("cards") or []
-
-    with open(abs_path, "r", encoding="utf-8-sig", newline="") as f:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
         reader = csv.DictReader(f)
         fieldnames = reader.fieldnames or []
         lower_map = {c.strip().lower(): c for c in fieldnames}
@@ -365,8 +1589,34 @@ def load_flashcards(subject_dir: str):
                 "module": module,
                 "clep_trap": clep_trap
             })
-        _FLASHCARDS_CACHE[key] = {"mtime": mtime, "cards": cards}
-        return cards
+    return cards
+
+
+_NO_FLASHCARDS = {"cards": [], "by_module": {}, "modules": []}  # shared pack for subjects without flashcards
+
+
+def get_flashcards(subject_dir: str):
+    """Cached pack for a subject's flashcards: the card list, a per-module index and the module summary."""
+    if serving_bundles():
+        return bundle_part(subject_dir, "flashcards")
+    path = subject_artifact(subject_dir, "flashcards")
+    if not path:
+        return _NO_FLASHCARDS
+    abs_path = os.path.abspath(path)
+    key = (os.path.abspath(subject_dir), abs_path)
+    mtime = os.path.getmtime(abs_path)
+
+    def build():
+        cards = load_parsed("flashcards", abs_path, parse_flashcards_csv)
+        return {
+            "mtime": mtime,
+            "cards": cards,
+            "by_module": _group_by_module(cards),
+            "modules": flashcard_modules(cards),
+            "path": abs_path,
+        }
+
+    return _FLASHCARDS_CACHE.get(key, mtime, build)
 
 
 def flashcard_modules(cards):
@@ -385,33 +1635,21 @@ def flashcard_modules(cards):
 
 
 # -------- Quiz --------
-_QUIZ_CACHE = {}  # (subject, abs_path) -> {"mtime": float, "items": [...], "path": str}
+_QUIZ_CACHE = LoaderCache("quiz")  # (subject, abs_path) -> {"mtime": float, "items": [...], "by_module": {...}, "modules": [...], "path": str}
 
-def _quiz_paths(subject_dir: str):
-    return [
-        os.path.join(subject_dir, "quiz", "quiz.csv"),
-        os.path.join(subject_dir, "quiz.csv"),
-    ]
+def load_quiz(subject_dir: str):
+    pack = get_quiz(subject_dir)
+    return pack["items"], pack["path"]
 
 
-def load_quiz(subject_dir: str):
+def parse_quiz_csv(path: str):
     """
     Supports flexible quiz CSVs.
     Typical columns:
       Module (optional), Question, Option A..E (or more), Answer, Explanation (optional), CLEP Trap (optional)
     Your uploaded quiz.csv: Question, Option A..E, Answer
     """
-    path = next((p for p in _quiz_paths(subject_dir) if os.path.exists(p)), None)
-    if not path:
-        return [], path
-    abs_path = os.path.abspath(path)
-    key = (os.path.abspath(subject_dir), abs_path)
-    mtime = os.path.getmtime(abs_path)
-    cached = _QUIZ_CACHE.get(key)
-    if cached and cached.get("mtime") == mtime:
-        return (cached.get("items") or []), cached.get("path", abs_path)
-
-    with open(abs_path, "r", encoding="utf-8-sig", newline="") as f:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
         reader = csv.DictReader(f)
         fieldnames = reader.fieldnames or []
         lower_map = {c.strip().lower(): c for c in fieldnames}
@@ -477,9 +1715,34 @@ def load_quiz(subject_dir: str):
                 "explanation": explanation,
                 "clep_trap": clep_trap,
             })
+    return items
 
-        _QUIZ_CACHE[key] = {"mtime": mtime, "items": items, "path": abs_path}
-        return items, abs_path
+
+_NO_QUIZ = {"items": [], "by_module": {}, "modules": [], "path": None}  # shared pack for subjects without a quiz
+
+
+def get_quiz(subject_dir: str):
+    """Cached pack for a subject's quiz: the item list, a per-module index, the module summary and the path."""
+    if serving_bundles():
+        return bundle_part(subject_dir, "quiz")
+    path = subject_artifact(subject_dir, "quiz")
+    if not path:
+        return _NO_QUIZ
+    abs_path = os.path.abspath(path)
+    key = (os.path.abspath(subject_dir), abs_path)
+    mtime = os.path.getmtime(abs_path)
+
+    def build():
+        items = load_parsed("quiz", abs_path, parse_quiz_csv)
+        return {
+            "mtime": mtime,
+            "items": items,
+            "by_module": _group_by_module(items),
+            "modules": quiz_modules(items),
+            "path": abs_path,
+        }
+
+    return _QUIZ_CACHE.get(key, mtime, build)
 
 
 def quiz_modules(items):
@@ -495,73 +1758,627 @@ def quiz_modules(items):
         nums = re.findall(r"\d+", mm)
         return (1, int(nums[0])) if nums else (2, mm.lower())
 
-    modules = sorted(counts.keys(), key=keyfn)
-    return [{"name": m, "count": counts[m]} for m in modules]
+    modules = sorted(counts.keys(), key=keyfn)
+    return [{"name": m, "count": counts[m]} for m in modules]
+
+
+# -------- Resources --------
+_RESOURCES_CACHE = LoaderCache("resources")  # (subject, abs_path) -> {"mtime": float, "resources": [...], "path": str}
+
+_NO_RESOURCES = {"resources": [], "path": None}  # shared pack for subjects without resources
+
+
+def get_resources(subject_dir: str):
+    """Cached pack for a subject's resources: the normalized section list and the path."""
+    if serving_bundles():
+        return bundle_part(subject_dir, "resources")
+    path = subject_artifact(subject_dir, "resources")
+    if not path:
+        return _NO_RESOURCES
+    abs_path = os.path.abspath(path)
+    key = (os.path.abspath(subject_dir), abs_path)
+    mtime = os.path.getmtime(abs_path)
+
+    def build():
+        normalized = load_parsed("resources", abs_path, parse_resources_json)
+        return {"mtime": mtime, "resources": normalized or [], "path": abs_path}
+
+    return _RESOURCES_CACHE.get(key, mtime, build)
+
+
+def load_resources(subject_dir: str):
+    pack = get_resources(subject_dir)
+    return pack["resources"], pack["path"]
+
+
+def parse_resources_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    # expected: list[{section, items:[{title,url|file,tag}]}]
+    if not isinstance(data, list):
+        return None
+
+    normalized = []
+    for block in data:
+        if not isinstance(block, dict):
+            continue
+        section = (block.get("section") or "").strip()
+        items = block.get("items") or []
+        if not section:
+            section = "Resources"
+        if not isinstance(items, list):
+            items = []
+        cleaned = []
+        for it in items:
+            if not isinstance(it, dict):
+                continue
+            title = (it.get("title") or "").strip()
+            url = (it.get("url") or "").strip()
+            file_ = (it.get("file") or "").strip()
+            tag = (it.get("tag") or "").strip()
+            if not title:
+                continue
+            if not url and not file_:
+                continue
+            cleaned.append({"title": title, "url": url, "file": file_, "tag": tag})
+        normalized.append({"section": section, "items": cleaned})
+    return normalized
+
+
+def resource_sections(resources):
+    counts = {}
+    for b in resources:
+        s = b.get("section") or "Resources"
+        counts[s] = counts.get(s, 0) + len(b.get("items") or [])
+    return [{"name": s, "count": counts[s]} for s in sorted(counts.keys(), key=lambda x: x.lower())]
+
+
+# -------- Mindmap --------
+# mindmap.md/markmap.md is turned into the same {content, children} node tree that
+# markmap's Transformer builds in the browser, once per mtime. Every node gets a
+# preorder id so large maps can be sent a few levels at a time and expanded lazily.
+
+_MINDMAP_CACHE = LoaderCache("mindmap")  # path -> {"mtime": float, "root": {...}, "nodes": [...], "etag": str}
+
+_MD_HEADING_RE = re.compile(r"^ {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_MD_LIST_RE = re.compile(r"^([ \t]*)(?:[-*+]|\d+[.)])[ \t]+(.*)$")
+_MD_UNSAFE_LINK_RE = re.compile(r"^\s*(?:javascript|vbscript|data):", re.I)
+
+
+def mindmap_path(subject_dir: str):
+    return subject_artifact(subject_dir, "mindmap")
+
+
+def _md_inline(text: str):
+    """Inline markdown subset used by the mindmaps: code, bold, italic, links."""
+    out = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    out = re.sub(r"`([^`]+)`", r"<code>\1</code>", out)
+    out = re.sub(r"\*\*(?!\s)(.+?)(?<!\s)\*\*", r"<strong>\1</strong>", out)
+    out = re.sub(r"(?<![\w*])\*(?![\s*])(.+?)(?<![\s*])\*(?![\w*])", r"<em>\1</em>", out)
+
+    def link(m):
+        href = m.group(2)
+        if _MD_UNSAFE_LINK_RE.match(href):
+            return m.group(1)
+        return f'<a href="{href}">{m.group(1)}</a>'
+
+    return re.sub(r"\[([^\]]+)\]\(([^)\s]+)\)", link, out)
+
+
+def _clean_mindmap_node(node):
+    # Same collapsing as markmap-lib's cleanNode: skip empty wrappers around a single child.
+    while not node["content"] and len(node["children"]) == 1:
+        node = node["children"][0]
+    while len(node["children"]) == 1 and not node["children"][0]["content"]:
+        node = {**node, "children": node["children"][0]["children"]}
+    return {**node, "children": [_clean_mindmap_node(c) for c in node["children"]]}
+
+
+def parse_mindmap_markdown(text: str):
+    """
+    Headings nest by level; list items nest by indentation under the nearest
+    heading; other lines continue the previous item (or become their own node).
+    """
+    root = {"content": "", "children": []}
+    headings = [(0, root)]  # (level, node)
+    items = []  # (indent, node)
+    last = None
+    in_fence = False
+
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        if not line.strip():
+            last = None
+            continue
+
+        m = _MD_HEADING_RE.match(line)
+        if m:
+            level = len(m.group(1))
+            node = {"content": _md_inline(m.group(2)), "children": []}
+            while headings[-1][0] >= level:
+                headings.pop()
+            headings[-1][1]["children"].append(node)
+            headings.append((level, node))
+            items = []
+            last = None
+            continue
+
+        m = _MD_LIST_RE.match(line)
+        if m:
+            indent = len(m.group(1).expandtabs(4))
+            node = {"content": _md_inline(m.group(2).strip()), "children": []}
+            while items and items[-1][0] >= indent:
+                items.pop()
+            parent = items[-1][1] if items else headings[-1][1]
+            parent["children"].append(node)
+            items.append((indent, node))
+            last = node
+            continue
+
+        if last is not None:
+            last["content"] += " " + _md_inline(line.strip())
+        else:
+            node = {"content": _md_inline(line.strip()), "children": []}
+            headings[-1][1]["children"].append(node)
+            items = []
+            last = node
+
+    return _clean_mindmap_node(root)
+
+
+def _number_mindmap_nodes(root):
+    nodes = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node["id"] = len(nodes)
+        nodes.append(node)
+        stack.extend(reversed(node["children"]))
+    return nodes
+
+
+def mindmap_subtree(node, depth=None):
+    """
+    Client copy of `node` with at most `depth` levels below it (None = all).
+    Nodes whose children were cut off are folded, carry payload.lazy = id and
+    payload.childCount, and get one placeholder child so markmap still draws
+    them as expandable; the client swaps it for the fetched children.
+    """
+    out = {"content": node["content"], "children": []}
+    if node["children"]:
+        if depth is not None and depth <= 0:
+            out["payload"] = {"fold": 1, "lazy": node["id"], "childCount": len(node["children"])}
+            out["children"] = [{"content": "…", "children": [], "payload": {"placeholder": 1}}]
+        else:
+            nxt = None if depth is None else depth - 1
+            out["children"] = [mindmap_subtree(c, nxt) for c in node["children"]]
+    return out
+
+
+def parse_mindmap_file(path: str):
+    with open(path, "rb") as f:
+        source = f.read()
+    return {
+        "root": parse_mindmap_markdown(source.decode("utf-8-sig", errors="replace")),
+        "etag": hashlib.sha1(source).hexdigest(),
+    }
+
+
+def get_mindmap_tree(subject_dir: str):
+    if serving_bundles():
+        return bundle_part(subject_dir, "mindmap")
+    path = mindmap_path(subject_dir)
+    if not path:
+        return None
+
+    mtime = os.path.getmtime(path)
+
+    def build():
+        parsed = load_parsed("mindmap", path, parse_mindmap_file)
+        root = parsed["root"]
+        return {
+            "path": path,
+            "mtime": mtime,
+            "root": root,
+            "nodes": _number_mindmap_nodes(root),
+            "etag": parsed["etag"],
+        }
+
+    return _MINDMAP_CACHE.get(path, mtime, build)
+
+
+# -------- Study guide (guide.html sections) --------
+# guide.html is a Google Docs export: every top-level h1/h2/h3 under <body> starts a
+# section that runs until the next one. We split it once per mtime so the study page
+# can fetch a small TOC and one section at a time instead of the whole document.
+
+_GUIDE_CACHE = LoaderCache("guide")  # path -> {"mtime": float, "toc": [...], "sections": [...]}
+
+_GUIDE_HEADINGS = ("h1", "h2", "h3")
+_VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "source", "track", "wbr",
+))
+# Browser default styles for tags the Google Docs stylesheet may not override
+_UA_BOLD_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6", "b", "strong", "th"))
+_UA_ITALIC_TAGS = frozenset(("i", "em", "cite", "var", "dfn", "address"))
+
+_CSS_RULE_RE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_CSS_SIMPLE_SELECTOR_RE = re.compile(r"\.?[A-Za-z][\w-]*")
+
+
+def _css_declarations(text: str):
+    decls = {}
+    for decl in (text or "").split(";"):
+        name, sep, value = decl.partition(":")
+        if sep:
+            decls[name.strip().lower()] = value.strip().lower()
+    return decls
+
+
+def _is_bold_weight(value: str):
+    value = (value or "").replace("!important", "").strip()
+    if value in ("bold", "bolder"):
+        return True
+    return value.isdigit() and int(value) >= 600
+
+
+def _is_italic_style(value: str):
+    value = (value or "").replace("!important", "").strip()
+    return value in ("italic", "oblique")
+
+
+def _guide_emphasis_rules(css: str):
+    """
+    Collect font-weight/font-style from the simple `.cN` and `tag` rules of a
+    Google Docs stylesheet. Values are (source_order, flag) so that, as in the
+    cascade, the later of two equally specific class rules wins.
+    """
+    css = re.sub(r"@import[^;]*;", "", css or "")
+    weight, style = {}, {}
+    for order, m in enumerate(_CSS_RULE_RE.finditer(css)):
+        decls = _css_declarations(m.group(2))
+        fw = decls.get("font-weight")
+        fs = decls.get("font-style")
+        if fw is None and fs is None:
+            continue
+        for sel in m.group(1).split(","):
+            sel = sel.strip()
+            if not _CSS_SIMPLE_SELECTOR_RE.fullmatch(sel):
+                continue
+            if fw is not None:
+                weight[sel] = (order, _is_bold_weight(fw))
+            if fs is not None:
+                style[sel] = (order, _is_italic_style(fs))
+    return weight, style
+
+
+def _resolve_emphasis(rules, tag, classes, inline_value, ua_tags, inherited):
+    # inline style > class rules (last wins) > tag rule > UA default > inherited
+    if inline_value is not None:
+        return inline_value
+    best = None
+    for c in classes:
+        r = rules.get("." + c)
+        if r and (best is None or r[0] > best[0]):
+            best = r
+    if best:
+        return best[1]
+    r = rules.get(tag)
+    if r:
+        return r[1]
+    if tag in ua_tags:
+        return True
+    return inherited
+
+
+class _GuideSectionParser(HTMLParser):
+    """
+    Re-emit the <body> markup of guide.html, cut at each top-level heading.
+
+    Elements that render bold/italic under the document's own stylesheet get
+    the page's force-bold/force-italic classes, so fragments keep their
+    emphasis without the Google Docs <style> block.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.sections = []
+        self._in_body = False
+        self._depth = 0  # nesting depth below <body>
+        self._current = None
+        self._in_heading = False
+        self._in_style = False
+        self._css = []
+        self._weight_rules = {}
+        self._style_rules = {}
+        self._emphasis = [(False, False)]  # (bold, italic) of open elements
+
+    def _emit(self, text):
+        if self._current is not None:
+            self._current["parts"].append(text)
+            if self._in_heading:
+                self._current["title"].append(text)
+
+    def _annotated_starttag(self, tag, attrs):
+        attr_map = dict(attrs)
+        classes = (attr_map.get("class") or "").split()
+        inline = _css_declarations(attr_map.get("style") or "")
+        inline_bold = _is_bold_weight(inline["font-weight"]) if "font-weight" in inline else None
+        inline_italic = _is_italic_style(inline["font-style"]) if "font-style" in inline else None
+
+        parent_bold, parent_italic = self._emphasis[-1]
+        bold = _resolve_emphasis(self._weight_rules, tag, classes, inline_bold, _UA_BOLD_TAGS, parent_bold)
+        italic = _resolve_emphasis(self._style_rules, tag, classes, inline_italic, _UA_ITALIC_TAGS, parent_italic)
+        if tag not in _VOID_TAGS:
+            self._emphasis.append((bold, italic))
+
+        text = self.get_starttag_text()
+        extra = [c for c, on in (("force-bold", bold), ("force-italic", italic)) if on]
+        if not extra:
+            return text
+
+        out = [tag]
+        class_done = False
+        for name, value in attrs:
+            if name == "class":
+                value = " ".join(classes + extra)
+                class_done = True
+            if value is None:
+                out.append(name)
+            else:
+                out.append(f'{name}="{html.escape(value, quote=True)}"')
+        if not class_done:
+            out.append('class="{}"'.format(" ".join(extra)))
+        return "<" + " ".join(out) + (" />" if text.endswith("/>") else ">")
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "style" and not self._in_body:
+            self._in_style = True
+            return
+        if tag == "body":
+            self._in_body = True
+            self._depth = 0
+            self._weight_rules, self._style_rules = _guide_emphasis_rules("".join(self._css))
+            return
+        if not self._in_body:
+            return
+        if self._depth == 0 and tag in _GUIDE_HEADINGS:
+            self._current = {"tag": tag, "title": [], "parts": []}
+            self.sections.append(self._current)
+            self._in_heading = True
+        self._emit(self._annotated_starttag(tag, attrs))
+        if tag not in _VOID_TAGS:
+            self._depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self._in_body:
+            self._emit(self._annotated_starttag(tag, attrs))
+            if tag not in _VOID_TAGS:
+                self._emphasis.pop()
+
+    def handle_endtag(self, tag):
+        if tag == "style":
+            self._in_style = False
+            return
+        if tag == "body":
+            self._in_body = False
+            return
+        if not self._in_body or tag in _VOID_TAGS:
+            return
+        self._emit(f"</{tag}>")
+        self._depth = max(0, self._depth - 1)
+        if len(self._emphasis) > 1:
+            self._emphasis.pop()
+        if self._depth == 0:
+            self._in_heading = False
+
+    def handle_data(self, data):
+        if self._in_style:
+            self._css.append(data)
+        elif self._in_body:
+            self._emit(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(f"&{name};")
+
+    def handle_charref(self, name):
+        self.handle_data(f"&#{name};")
+
+
+def _guide_heading_text(parts):
+    # Approximates innerText: drop tags, decode entities, collapse whitespace.
+    raw = re.sub(r"<[^>]*>", "", "".join(parts))
+    return re.sub(r"\s+", " ", html.unescape(raw)).strip()
+
+
+def _guide_toc_kind(tag, title):
+    if tag == "h1":
+        return "h1"
+    if tag == "h2":
+        return "module" if re.match(r"^module\s*\d+", title, flags=re.I) else "h2"
+    return "h3"
+
+
+def parse_guide_sections(full_path: str):
+    with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+        source = f.read()
+
+    parser = _GuideSectionParser()
+    parser.feed(source)
+    parser.close()
+
+    sections = []
+    for s in parser.sections:
+        sections.append({
+            "tag": s["tag"],
+            "title": _guide_heading_text(s["title"]),
+            "html": "".join(s["parts"]),
+        })
+    return sections
+
+
+def get_guide_sections(subject_dir: str):
+    if serving_bundles():
+        return bundle_part(subject_dir, "guide")
+    path = subject_artifact(subject_dir, "guide")
+    if not path:
+        return None
+
+    mtime = os.path.getmtime(path)
+
+    def build():
+        sections = load_parsed("guide", path, parse_guide_sections)
+        toc = [
+            {"idx": i, "title": s["title"], "kind": _guide_toc_kind(s["tag"], s["title"])}
+            for i, s in enumerate(sections)
+        ]
+        return {
+            "path": path,
+            "mtime": mtime,
+            "toc": toc,
+            "sections": sections,
+        }
+
+    return _GUIDE_CACHE.get(path, mtime, build)
+
+
+# -------- Study guide (pruned full document for /doc) --------
+# The Google Docs export ships a stylesheet covering every list and class in the
+# document. /doc serves a rebuilt copy with unused rules dropped, rules that share a
+# declaration block merged, and the markup lightly minified, cached per mtime.
+
+_GUIDE_DOC_CACHE = LoaderCache("guide_doc")  # path -> {"mtime": float, "body": bytes, "etag": str}
+
+_CSS_CLASS_RE = re.compile(r"\.([A-Za-z_][\w-]*)")
+_CSS_PROPERTY_RE = re.compile(r"(?:^|;)\s*([\w-]+)\s*:")
+
+
+def _split_css_rules(css: str):
+    """Top-level (prelude, block) pairs; block is None for statements like @import."""
+    rules = []
+    i, n = 0, len(css)
+    while i < n:
+        j = i
+        while j < n and css[j] not in "{;}":
+            j += 1
+        if j >= n:
+            break
+        prelude = css[i:j].strip()
+        if css[j] != "{":
+            if css[j] == ";" and prelude:
+                rules.append((prelude, None))
+            i = j + 1
+            continue
+        depth, k = 0, j
+        while k < n:
+            if css[k] == "{":
+                depth += 1
+            elif css[k] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            k += 1
+        rules.append((prelude, css[j + 1:k]))
+        i = k + 1
+    return rules
+
+
+def prune_guide_css(css: str, used_classes):
+    """
+    Drop selectors that reference a class never used in the markup, then fold
+    rules with identical declarations into one. A rule is only moved up to an
+    earlier twin when no rule or at-rule block in between could set any of the
+    same properties, so the cascade result is unchanged. Statement at-rules
+    (@charset, @import) lead the output; at-rule blocks (@media, @font-face, ...)
+    keep their place among the rules.
+    """
+    statements = []
+    rules = []  # [selectors, declarations, property set]; selectors None for an at-rule block
+    for prelude, block in _split_css_rules(css):
+        if block is None:
+            statements.append(prelude + ";")
+            continue
+        if prelude.startswith("@"):
+            rules.append([None, prelude + "{" + block + "}", None])
+            continue
+        selectors = [
+            sel.strip() for sel in prelude.split(",")
+            if sel.strip() and all(c in used_classes for c in _CSS_CLASS_RE.findall(sel))
+        ]
+        decls = ";".join(d.strip() for d in block.split(";") if d.strip())
+        if not selectors or not decls:
+            continue
+        rules.append([selectors, decls, set(_CSS_PROPERTY_RE.findall(decls))])
+
+    merged = []
+    for selectors, decls, props in rules:
+        if selectors is None:
+            merged.append([None, decls, None])
+            continue
+        target = None
+        for prev in reversed(merged):
+            if prev[0] is None:
+                break  # never merge across an at-rule block
+            if prev[1] == decls:
+                target = prev
+                break
+            if prev[2] & props:
+                break
+        if target is not None:
+            target[0].extend(s for s in selectors if s not in target[0])
+        else:
+            merged.append([list(selectors), decls, props])
 
+    return "".join(statements) + "".join(
+        decls if sel is None else ",".join(sel) + "{" + decls + "}" for sel, decls, _ in merged
+    )
 
-# -------- Resources --------
-_RESOURCES_CACHE = {}  # (subject, abs_path) -> {"mtime": float, "resources": [...], "path": str}
 
-def _resources_paths(subject_dir: str):
-    return [
-        os.path.join(subject_dir, "resources", "resources.json"),
-        os.path.join(subject_dir, "resources.json"),
-    ]
+def build_guide_doc(full_path: str):
+    with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+        source = f.read()
 
+    body_at = source.find("<body")
+    markup = source[body_at:] if body_at >= 0 else source
+    used_classes = set()
+    for m in re.finditer(r"class=\"([^\"]*)\"", markup):
+        used_classes.update(m.group(1).split())
 
-def load_resources(subject_dir: str):
-    path = next((p for p in _resources_paths(subject_dir) if os.path.exists(p)), None)
-    if not path:
-        return [], path
-    abs_path = os.path.abspath(path)
-    key = (os.path.abspath(subject_dir), abs_path)
-    mtime = os.path.getmtime(abs_path)
-    cached = _RESOURCES_CACHE.get(key)
-    if cached and cached.get("mtime") == mtime:
-        return (cached.get("resources") or []), cached.get("path", abs_path)
+    def prune(m):
+        return "<style" + m.group(1) + ">" + prune_guide_css(m.group(2), used_classes) + "</style>"
 
-    with open(abs_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    out = re.sub(r"<style([^>]*)>(.*?)</style>", prune, source, flags=re.S | re.I)
+    out = re.sub(r"<!--.*?-->", "", out, flags=re.S)
+    out = re.sub(r">\s{2,}<", "> <", out)
+    return out.strip().encode("utf-8")
 
-    # expected: list[{section, items:[{title,url|file,tag}]}]
-    if not isinstance(data, list):
-        return [], path
 
-    normalized = []
-    for block in data:
-        if not isinstance(block, dict):
-            continue
-        section = (block.get("section") or "").strip()
-        items = block.get("items") or []
-        if not section:
-            section = "Resources"
-        if not isinstance(items, list):
-            items = []
-        cleaned = []
-        for it in items:
-            if not isinstance(it, dict):
-                continue
-            title = (it.get("title") or "").strip()
-            url = (it.get("url") or "").strip()
-            file_ = (it.get("file") or "").strip()
-            tag = (it.get("tag") or "").strip()
-            if not title:
-                continue
-            if not url and not file_:
-                continue
-            cleaned.append({"title": title, "url": url, "file": file_, "tag": tag})
-        normalized.append({"section": section, "items": cleaned})
+def get_guide_doc(subject_dir: str):
+    if serving_bundles():
+        return bundle_part(subject_dir, "guide_doc")
+    path = subject_artifact(subject_dir, "guide")
+    if not path:
+        return None
 
-    _RESOURCES_CACHE[key] = {"mtime": mtime, "resources": normalized, "path": abs_path}
-    return normalized, abs_path
+    mtime = os.path.getmtime(path)
 
+    def build():
+        body = load_parsed("guide-doc", path, build_guide_doc)
+        return {
+            "path": path,
+            "mtime": mtime,
+            "body": body,
+            "etag": hashlib.sha1(body).hexdigest(),
+        }
 
-def resource_sections(resources):
-    counts = {}
-    for b in resources:
-        s = b.get("section") or "Resources"
-        counts[s] = counts.get(s, 0) + len(b.get("items") or [])
-    return [{"name": s, "count": counts[s]} for s in sorted(counts.keys(), key=lambda x: x.lower())]
+    return _GUIDE_DOC_CACHE.get(path, mtime, build)
 
 
 # -----------------------------
@@ -812,10 +2629,11 @@ STUDY_HTML = r"""
   <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
   <link href="https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;700&family=IBM+Plex+Mono:wght@500&display=swap" rel="stylesheet">
 
-  <!-- Markmap deps (LOCAL) -->
-  <script src="{{ url_for('static', filename='vendor/markmap/d3.min.js') }}"></script>
-  <script src="{{ url_for('static', filename='vendor/markmap/markmap-lib.iife.js') }}"></script>
-  <script src="{{ url_for('static', filename='vendor/markmap/markmap-view.js') }}"></script>
+  <!-- Markmap deps (LOCAL) are injected on demand by the Mindmap tool -->
+  {% if has_mindmap %}
+  <link rel="prefetch" as="script" href="{{ url_for('static', filename='vendor/markmap/d3.min.js') }}">
+  <link rel="prefetch" as="script" href="{{ url_for('static', filename='vendor/markmap/markmap-view.js') }}">
+  {% endif %}
 
   <style>
     :root {
@@ -1400,7 +3218,7 @@ STUDY_HTML = r"""
   </style>
 </head>
 
-<body>
+<body data-subject="{{ subject_slug }}" data-static="{{ url_for('static', filename='') }}">
 <div class="top-nav">
   <div class="nav-left">
     <div class="tool-btn active" id="btn-notes" onclick="selectTool('notes')"><span class="tool-icon"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.8" stroke-linecap="round" stroke-linejoin="round"><rect x="5" y="3" width="14" height="18" rx="2"></rect><line x1="9" y1="8" x2="15" y2="8"></line><line x1="9" y1="12" x2="15" y2="12"></line></svg></span><span class="tool-label">Study Guide</span></div>
@@ -1441,14 +3259,15 @@ STUDY_HTML = r"""
     </div>
   </div>
 
-  <iframe id="loader" src="/doc/{{ subject_slug }}" style="display:none;"></iframe>
-
   <div id="lightbox" onclick="this.style.display='none'">
     <img id="lightbox-img">
   </div>
 
   <script>
-    const loader = document.getElementById('loader');
+    const SUBJECT = document.body.dataset.subject || '';
+    const SUBJECT_URL = encodeURIComponent(SUBJECT);
+    const STATIC_URL = document.body.dataset.static || '/static/';
+
     const tocNotes = document.getElementById('toc-notes');
     const tocTables = document.getElementById('toc-tables');
     const tocFlash = document.getElementById('toc-flashcards');
@@ -1459,6 +3278,22 @@ STUDY_HTML = r"""
 
     let allItems = [];
     let currentIdx = -1;
+    let activeTool = 'notes';
+    const sectionCache = new Map();
+
+    // One request at startup describes every tool. Each sidebar list is filled from it
+    // the first time; later refreshes go back to the per-tool routes.
+    const manifestPromise = fetch('/subject_manifest/' + SUBJECT_URL, { cache: 'no-cache' })
+      .then(res => res.ok ? res.json() : null)
+      .catch(() => null);
+    const manifestUsed = new Set();
+
+    async function fromManifest(tool) {
+      if (manifestUsed.has(tool)) return null;
+      manifestUsed.add(tool);
+      const manifest = await manifestPromise;
+      return (manifest && manifest[tool]) || null;
+    }
 
     // DataTables state
     let tablesList = [];
@@ -1510,9 +3345,6 @@ STUDY_HTML = r"""
     // -----------------------------
     // NOTES
     // -----------------------------
-    function isModuleHeading(txt) {
-      return /^module\s*\d+/i.test((txt || '').trim());
-    }
     function isTopLevel(linkEl) {
       return linkEl.classList.contains('toc-h1') || linkEl.classList.contains('toc-module');
     }
@@ -1587,27 +3419,33 @@ STUDY_HTML = r"""
       ensureExpandedForIndex(idx);
     }
 
-    loader.onload = function() {
-      const doc = loader.contentDocument || loader.contentWindow.document;
-      const headings = Array.from(doc.querySelectorAll('h1, h2, h3'));
+    async function loadGuideToc() {
+      let toc = [];
+      try {
+        let data = await fromManifest('guide');
+        if (!data) {
+          const res = await fetch('/doc_toc/' + SUBJECT_URL, { cache: 'no-cache' });
+          if (!res.ok) throw new Error('toc failed');
+          data = await res.json();
+        }
+        toc = Array.isArray(data.toc) ? data.toc : [];
+      } catch (e) {
+        toc = [];
+      }
 
       allItems = [];
       tocNotes.innerHTML = "";
 
-      headings.forEach((heading) => {
+      toc.forEach((entry) => {
         const link = document.createElement('a');
-        link.textContent = heading.innerText;
+        link.textContent = entry.title || '';
         link.href = "javascript:void(0)";
         link.className = "toc-item";
-
-        if (heading.tagName === "H1") link.classList.add("toc-h1");
-        else if (heading.tagName === "H2" && isModuleHeading(heading.innerText)) link.classList.add("toc-module");
-        else if (heading.tagName === "H2") link.classList.add("toc-h2");
-        else link.classList.add("toc-h3");
+        link.classList.add("toc-" + (entry.kind || "h3"));
 
         tocNotes.appendChild(link);
 
-        const item = { heading, link };
+        const item = { idx: entry.idx, link };
         allItems.push(item);
 
         link.addEventListener('pointerup', (e) => {
@@ -1630,49 +3468,47 @@ STUDY_HTML = r"""
       if (allItems.length) {
         loadSection(0);
         ensureExpandedForIndex(0);
+      } else {
+        displayArea.innerHTML = 'No study guide found.';
       }
       updateNavButtons();
-    };
-
-    function processNode(node) {
-      const clone = node.cloneNode(true);
-      const sourceElements = node.querySelectorAll ? [node, ...node.querySelectorAll('*')] : [node];
-      const cloneElements  = clone.querySelectorAll ? [clone, ...clone.querySelectorAll('*')] : [clone];
-
-      sourceElements.forEach((el, i) => {
-        if (!el.style) return;
-        const style = window.getComputedStyle(el);
-        const target = cloneElements[i];
-        if (parseInt(style.fontWeight) >= 600 || style.fontWeight === 'bold') target.classList.add('force-bold');
-        if (style.fontStyle === 'italic') target.classList.add('force-italic');
-      });
+    }
 
-      return clone;
+    async function fetchSection(index) {
+      if (sectionCache.has(index)) return sectionCache.get(index);
+      const res = await fetch(`/doc_section/${SUBJECT_URL}/${allItems[index].idx}`, { cache: 'no-cache' });
+      if (!res.ok) throw new Error('section failed');
+      const data = await res.json();
+      const html = data.html || '';
+      sectionCache.set(index, html);
+      return html;
     }
 
-    function loadSection(index) {
+    async function loadSection(index) {
       if (index < 0 || index >= allItems.length) return;
       currentIdx = index;
 
       allItems.forEach(i => i.link.classList.remove('active'));
-      const current = allItems[index];
-      current.link.classList.add('active');
-
-      displayArea.innerHTML = '';
-      const section = document.createElement('div');
-      const contentSource = current.heading;
+      allItems[index].link.classList.add('active');
+      updateNavButtons();
 
-      section.appendChild(processNode(contentSource));
-      let next = contentSource.nextElementSibling;
-      while (next && !['H1', 'H2', 'H3'].includes(next.tagName)) {
-        section.appendChild(processNode(next));
-        next = next.nextElementSibling;
+      let html = '';
+      try {
+        html = await fetchSection(index);
+      } catch (e) {
+        if (currentIdx === index && activeTool === 'notes') displayArea.innerHTML = 'Failed to load section.';
+        return;
       }
+      // another section or tool may have been picked while the fetch was in flight
+      if (currentIdx !== index || activeTool !== 'notes') return;
 
-      const allImages = section.querySelectorAll('img');
-      allImages.forEach(img => {
+      // <template> content is inert, so images are not requested before their src is fixed
+      const tpl = document.createElement('template');
+      tpl.innerHTML = html;
+
+      tpl.content.querySelectorAll('img').forEach(img => {
         const fileName = (img.getAttribute('src') || '').split('/').pop();
-        const fullPath = '/study/{{ subject_slug }}/images/' + fileName;
+        const fullPath = '/study/' + SUBJECT_URL + '/images/' + fileName;
         img.src = fullPath;
         img.style.cursor = "zoom-in";
         img.onclick = () => {
@@ -1681,23 +3517,60 @@ STUDY_HTML = r"""
         };
       });
 
+      const section = document.createElement('div');
+      section.appendChild(tpl.content);
+
+      displayArea.innerHTML = '';
       displayArea.appendChild(section);
-      updateNavButtons();
     }
 
     // -----------------------------
     // Slide Deck / Mindmap
     // -----------------------------
+    // d3 + markmap-view are only needed by the Mindmap tool, so they are injected the
+    // first time it opens. async=false keeps execution order while downloading in parallel.
+    // The markdown -> tree transform runs on the server, so markmap-lib is not loaded.
+    const MARKMAP_SCRIPTS = [
+      'vendor/markmap/d3.min.js',
+      'vendor/markmap/markmap-view.js',
+    ];
+    // Levels sent up front; deeper branches come from /mindmap_tree/<subject>/<id>
+    const MINDMAP_DEPTH = 4;
+    const scriptPromises = new Map();
+
+    function loadScriptOnce(src) {
+      if (scriptPromises.has(src)) return scriptPromises.get(src);
+      const p = new Promise((resolve, reject) => {
+        const el = document.createElement('script');
+        el.src = src;
+        el.async = false;
+        el.onload = () => resolve();
+        el.onerror = () => {
+          scriptPromises.delete(src);
+          el.remove();
+          reject(new Error('failed to load ' + src));
+        };
+        document.head.appendChild(el);
+      });
+      scriptPromises.set(src, p);
+      return p;
+    }
+
+    async function ensureMarkmap() {
+      await Promise.all(MARKMAP_SCRIPTS.map(path => loadScriptOnce(STATIC_URL + path)));
+      return window.markmap;
+    }
+
     async function renderSlideDeck() {
       setPageMode('tool');
       displayArea.innerHTML = `
         <div class="panel">
           <div class="panel-header">
             <div class="panel-title">Slide Deck</div>
-            <div style="display:flex;gap:10px;align-items:center;"><button class="pill-btn" id="slides-fullscreen-btn" type="button">Fullscreen</button><a class="panel-link" href="/slides_pdf/{{ subject_slug }}" target="_blank" rel="noopener">Open PDF in new tab</a></div>
+            <div style="display:flex;gap:10px;align-items:center;"><button class="pill-btn" id="slides-fullscreen-btn" type="button">Fullscreen</button><a class="panel-link" href="/slides_pdf/${SUBJECT_URL}" target="_blank" rel="noopener">Open PDF in new tab</a></div>
           </div>
           <div class="panel-body">
-            <iframe id="slide-iframe" src="/slides_pdf/{{ subject_slug }}" allowfullscreen="true" webkitallowfullscreen="true" mozallowfullscreen="true"></iframe>
+            <iframe id="slide-iframe" src="/slides_pdf/${SUBJECT_URL}" allowfullscreen="true" webkitallowfullscreen="true" mozallowfullscreen="true"></iframe>
           </div>
         </div>
       `;
@@ -1715,13 +3588,55 @@ STUDY_HTML = r"""
       }
     }
 
+    function bindMindmapClicks(mm) {
+      mm.g.selectAll('g.markmap-node')
+        .style('cursor', 'pointer')
+        .on('click', (event, d) => {
+          event.stopPropagation();
+          toggleMindmapNode(mm, d);
+        });
+    }
+
+    async function toggleMindmapNode(mm, d) {
+      const lazyId = d.payload ? d.payload.lazy : null;
+      if (lazyId !== undefined && lazyId !== null) {
+        // d.children holds a single placeholder until the real branch is fetched
+        let children = [];
+        try {
+          const res = await fetch(`/mindmap_tree/${SUBJECT_URL}/${lazyId}?depth=${MINDMAP_DEPTH}`, { cache: 'no-cache' });
+          if (!res.ok) throw new Error('children failed');
+          const data = await res.json();
+          children = Array.isArray(data.children) ? data.children : [];
+        } catch (e) {
+          return;
+        }
+        d.children = children;
+        d.payload = { ...d.payload, lazy: null, fold: 0 };
+        // re-initialise so the new nodes get layout state, without re-folding what the user opened
+        await mm.setData(mm.state.data, { initialExpandLevel: -1 });
+      } else {
+        await mm.toggleNode(d, true);
+        // a recursive unfold cannot open branches that have not been fetched yet
+        let refold = false;
+        (function walk(n) {
+          if (n.payload && n.payload.lazy !== undefined && n.payload.lazy !== null && !n.payload.fold) {
+            n.payload = { ...n.payload, fold: 1 };
+            refold = true;
+          }
+          (n.children || []).forEach(walk);
+        })(d);
+        if (refold) await mm.renderData(d);
+      }
+      bindMindmapClicks(mm);
+    }
+
     async function renderMindmap() {
       setPageMode('tool');
       displayArea.innerHTML = `
         <div class="panel">
           <div class="panel-header">
             <div class="panel-title">Mindmap</div>
-            <a class="panel-link" href="/mindmap_md/{{ subject_slug }}" target="_blank" rel="noopener">Open MD in new tab</a>
+            <a class="panel-link" href="/mindmap_md/${SUBJECT_URL}" target="_blank" rel="noopener">Open MD in new tab</a>
           </div>
           <div class="panel-body">
             <svg id="mindmap"></svg>
@@ -1729,30 +3644,33 @@ STUDY_HTML = r"""
         </div>
       `;
 
-      let md = "";
+      const libReady = ensureMarkmap().catch(() => null);
+
+      let root = null;
       try {
-        const res = await fetch('/mindmap_md/{{ subject_slug }}', { cache: 'no-store' });
+        const res = await fetch(`/mindmap_tree/${SUBJECT_URL}?depth=${MINDMAP_DEPTH}`, { cache: 'no-cache' });
         if (!res.ok) throw new Error('not found');
-        md = await res.text();
+        root = (await res.json()).root;
+        if (!root) throw new Error('empty');
       } catch (e) {
         displayArea.innerHTML = `
           <div class="panel">
             <div class="panel-header"><div class="panel-title">Mindmap</div></div>
             <div class="panel-body" style="padding:18px;background:#fff;">
               <div style="font-weight:900;margin-bottom:10px;">Mindmap not found</div>
-              <div style="color:#4a5568;">Expected file: {{ subject_slug }}/mindmap.md (or markmap.md)</div>
+              <div style="color:#4a5568;">Expected file: ${escapeHtml(SUBJECT)}/mindmap.md (or markmap.md)</div>
             </div>
           </div>
         `;
         return;
       }
 
-      if (!window.markmap || !window.markmap.Transformer || !window.markmap.Markmap) return;
-
-      const { Transformer, Markmap } = window.markmap;
-      const transformer = new Transformer();
-      const { root } = transformer.transform(md);
+      const lib = await libReady;
+      if (!lib || !lib.Markmap) return;
+      // the user may have switched tools while the scripts were loading
+      if (activeTool !== 'mindmap' || !document.getElementById('mindmap')) return;
 
+      const { Markmap } = lib;
       const mm = Markmap.create('#mindmap', {
         autoFit: true,
         zoom: true,
@@ -1763,15 +3681,12 @@ STUDY_HTML = r"""
 
       mm.fit();
 
-      mm.g.selectAll('g.markmap-node')
-        .style('cursor', 'pointer')
-        .on('click', (event, d) => {
-          event.stopPropagation();
-          mm.toggleNode(d, true);
-        });
+      // circles go through handleClick, node labels through bindMindmapClicks
+      mm.handleClick = (event, d) => toggleMindmapNode(mm, d);
+      bindMindmapClicks(mm);
 
       setTimeout(() => mm.fit(), 50);
-      setTimeout(() => mm.fit(), 250);
+      setTimeout(() => { mm.fit(); bindMindmapClicks(mm); }, 250);
     }
 
     // -----------------------------
@@ -1796,9 +3711,12 @@ STUDY_HTML = r"""
 
     async function loadTableList() {
       try {
-        const res = await fetch('/datatable_list/{{ subject_slug }}', { cache: 'no-store' });
-        if (!res.ok) throw new Error('list failed');
-        const data = await res.json();
+        let data = await fromManifest('tables');
+        if (!data) {
+          const res = await fetch('/datatable_list/' + SUBJECT_URL, { cache: 'no-cache' });
+          if (!res.ok) throw new Error('list failed');
+          data = await res.json();
+        }
         tablesList = Array.isArray(data.tables) ? data.tables : [];
       } catch (e) {
         tablesList = [];
@@ -1878,26 +3796,7 @@ STUDY_HTML = r"""
       });
 
       buildDataTableUI(sheetName);
-      document.getElementById('dt-open-raw').href = `/datatable_raw/{{ subject_slug }}/${encodeURIComponent(tableId)}`;
-
-      let payload = null;
-      try {
-        const res = await fetch(`/datatable_data/{{ subject_slug }}/${encodeURIComponent(tableId)}`, { cache: 'no-store' });
-        if (!res.ok) throw new Error('data failed');
-        payload = await res.json();
-      } catch (e) {
-        document.getElementById('dt-meta').textContent = "Failed to load";
-        return;
-      }
-
-      const columns = Array.isArray(payload.columns) ? payload.columns : [];
-      const rows = Array.isArray(payload.rows) ? payload.rows : [];
-
-      let filtered = rows.slice();
-      let sortCol = null;
-      let sortDir = 'asc';
-      let page = 1;
-      let pageSize = 25;
+      document.getElementById('dt-open-raw').href = `/datatable_raw/${SUBJECT_URL}/${encodeURIComponent(tableId)}`;
 
       const elSearch = document.getElementById('dt-search');
       const elSize = document.getElementById('dt-pagesize');
@@ -1907,50 +3806,42 @@ STUDY_HTML = r"""
       const elNext = document.getElementById('dt-next');
       const elPage = document.getElementById('dt-page');
 
-      function applyFilter() {
-        const q = (elSearch.value || '').trim().toLowerCase();
-        if (!q) filtered = rows.slice();
-        else {
-          filtered = rows.filter(r => {
-            for (const c of columns) {
-              const v = safeCellText(r[c]).toLowerCase();
-              if (v.includes(q)) return true;
-            }
-            return false;
-          });
+      // Filtering, sorting and paging happen on the server; we only keep the query state.
+      let columns = [];
+      let sortCol = null;
+      let sortDir = 'asc';
+      let page = 1;
+      let pageSize = 25;
+      let totalPages = 1;
+      let requestSeq = 0;
+      let searchTimer = null;
+
+      async function fetchPage() {
+        const seq = ++requestSeq;
+        const params = new URLSearchParams({ format: 'compact', page: String(page), page_size: String(pageSize) });
+        const q = (elSearch.value || '').trim();
+        if (q) params.set('q', q);
+        if (sortCol) { params.set('sort', sortCol); params.set('dir', sortDir); }
+
+        let payload = null;
+        try {
+          const res = await fetch(`/datatable_data/${SUBJECT_URL}/${encodeURIComponent(tableId)}?${params}`, { cache: 'no-cache' });
+          if (!res.ok) throw new Error('data failed');
+          payload = await res.json();
+        } catch (e) {
+          if (seq === requestSeq && activeTableId === tableId) elMeta.textContent = "Failed to load";
+          return;
         }
-        page = 1;
-        applySort();
-      }
-
-      function applySort() {
-        if (!sortCol) { render(); return; }
-        filtered.sort((a, b) => {
-          const av = safeCellText(a[sortCol]).toLowerCase();
-          const bv = safeCellText(b[sortCol]).toLowerCase();
-
-          const an = Number(av), bn = Number(bv);
-          const aNum = !isNaN(an) && av !== '';
-          const bNum = !isNaN(bn) && bv !== '';
-          let cmp = 0;
+        // a newer query (or another table) superseded this one
+        if (seq !== requestSeq || activeTableId !== tableId) return;
 
-          if (aNum && bNum) cmp = an - bn;
-          else cmp = av.localeCompare(bv);
-
-          return sortDir === 'asc' ? cmp : -cmp;
-        });
-        render();
+        columns = Array.isArray(payload.columns) ? payload.columns : [];
+        page = Number(payload.page) || 1;
+        totalPages = Number(payload.pages) || 1;
+        render(Array.isArray(payload.rows) ? payload.rows : [], Number(payload.total) || 0);
       }
 
-      function render() {
-        const total = filtered.length;
-        const totalPages = Math.max(1, Math.ceil(total / pageSize));
-        if (page > totalPages) page = totalPages;
-
-        const start = (page - 1) * pageSize;
-        const end = start + pageSize;
-        const pageRows = filtered.slice(start, end);
-
+      function render(pageRows, total) {
         elMeta.textContent = `${total} rows`;
         elPage.textContent = `${page} / ${totalPages}`;
         elPrev.disabled = page <= 1;
@@ -1966,8 +3857,8 @@ STUDY_HTML = r"""
         html += "<tbody>";
         for (const r of pageRows) {
           html += "<tr>";
-          for (const c of columns) {
-            html += `<td>${escapeHtml(safeCellText(r[c]))}</td>`;
+          for (let i = 0; i < columns.length; i++) {
+            html += `<td>${escapeHtml(safeCellText(r[i]))}</td>`;
           }
           html += "</tr>";
         }
@@ -1980,17 +3871,20 @@ STUDY_HTML = r"""
             const col = decodeURIComponent(th.getAttribute("data-col"));
             if (sortCol === col) sortDir = (sortDir === 'asc' ? 'desc' : 'asc');
             else { sortCol = col; sortDir = 'asc'; }
-            applySort();
+            fetchPage();
           };
         });
       }
 
-      elSearch.oninput = () => applyFilter();
-      elSize.onchange = () => { pageSize = Number(elSize.value) || 25; page = 1; render(); };
-      elPrev.onclick = () => { if (page > 1) { page -= 1; render(); } };
-      elNext.onclick = () => { page += 1; render(); };
+      elSearch.oninput = () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => { page = 1; fetchPage(); }, 200);
+      };
+      elSize.onchange = () => { pageSize = Number(elSize.value) || 25; page = 1; fetchPage(); };
+      elPrev.onclick = () => { if (page > 1) { page -= 1; fetchPage(); } };
+      elNext.onclick = () => { if (page < totalPages) { page += 1; fetchPage(); } };
 
-      render();
+      await fetchPage();
     }
 
     async function renderDataTables() {
@@ -2006,7 +3900,7 @@ STUDY_HTML = r"""
             <div class="panel-header"><div class="panel-title">Data Table</div></div>
             <div class="panel-body" style="padding:18px;background:#fff;color:#4a5568;">
               No tables found.<br/><br/>
-              Put CSV/JSON tables in <b>{{ subject_slug }}/tables/</b> (recommended).
+              Put CSV/JSON tables in <b>${escapeHtml(SUBJECT)}/tables/</b> (recommended).
             </div>
           </div>
         `;
@@ -2025,7 +3919,7 @@ STUDY_HTML = r"""
         <div class="panel">
           <div class="panel-header">
             <div class="panel-title">Flashcards</div>
-            <a class="panel-link" href="/flashcards_raw/{{ subject_slug }}" target="_blank" rel="noopener">Open CSV</a>
+            <a class="panel-link" href="/flashcards_raw/${SUBJECT_URL}" target="_blank" rel="noopener">Open CSV</a>
           </div>
 
           <div class="fc-toolbar">
@@ -2108,9 +4002,12 @@ STUDY_HTML = r"""
 
     async function loadFlashModules() {
       try {
-        const res = await fetch('/flashcards_modules/{{ subject_slug }}', { cache: 'no-store' });
-        if (!res.ok) throw new Error('modules failed');
-        const data = await res.json();
+        let data = await fromManifest('flashcards');
+        if (!data) {
+          const res = await fetch('/flashcards_modules/' + SUBJECT_URL, { cache: 'no-cache' });
+          if (!res.ok) throw new Error('modules failed');
+          data = await res.json();
+        }
         modulesList = Array.isArray(data.modules) ? data.modules : [];
       } catch (e) {
         modulesList = [];
@@ -2154,11 +4051,11 @@ STUDY_HTML = r"""
       activeModule = modName || null;
       markActiveModule(activeModule);
 
-      let url = '/flashcards_data/{{ subject_slug }}';
+      let url = '/flashcards_data/' + SUBJECT_URL;
       if (activeModule) url += '?module=' + encodeURIComponent(activeModule);
 
       try {
-        const res = await fetch(url, { cache: 'no-store' });
+        const res = await fetch(url, { cache: 'no-cache' });
         if (!res.ok) throw new Error('cards failed');
         const data = await res.json();
         cards = Array.isArray(data.cards) ? data.cards : [];
@@ -2216,7 +4113,7 @@ STUDY_HTML = r"""
         <div class="panel">
           <div class="panel-header">
             <div class="panel-title">Quiz</div>
-            <a class="panel-link" href="/quiz_raw/{{ subject_slug }}" target="_blank" rel="noopener">Open CSV</a>
+            <a class="panel-link" href="/quiz_raw/${SUBJECT_URL}" target="_blank" rel="noopener">Open CSV</a>
           </div>
 
           <div class="qz-toolbar">
@@ -2235,9 +4132,12 @@ STUDY_HTML = r"""
 
     async function loadQuizModules() {
       try {
-        const res = await fetch('/quiz_modules/{{ subject_slug }}', { cache: 'no-store' });
-        if (!res.ok) throw new Error('modules failed');
-        const data = await res.json();
+        let data = await fromManifest('quiz');
+        if (!data) {
+          const res = await fetch('/quiz_modules/' + SUBJECT_URL, { cache: 'no-cache' });
+          if (!res.ok) throw new Error('modules failed');
+          data = await res.json();
+        }
         quizModules = Array.isArray(data.modules) ? data.modules : [];
       } catch (e) {
         quizModules = [];
@@ -2391,11 +4291,11 @@ STUDY_HTML = r"""
       activeQuizModule = modName || null;
       markActiveQuizModule(activeQuizModule);
 
-      let url = '/quiz_data/{{ subject_slug }}';
+      let url = '/quiz_data/' + SUBJECT_URL;
       if (activeQuizModule) url += '?module=' + encodeURIComponent(activeQuizModule);
 
       try {
-        const res = await fetch(url, { cache: 'no-store' });
+        const res = await fetch(url, { cache: 'no-cache' });
         if (!res.ok) throw new Error('quiz failed');
         const data = await res.json();
         quizItems = Array.isArray(data.items) ? data.items : [];
@@ -2429,7 +4329,7 @@ STUDY_HTML = r"""
         <div class="panel">
           <div class="panel-header">
             <div class="panel-title">Resources</div>
-            <a class="panel-link" href="/resources_raw/{{ subject_slug }}" target="_blank" rel="noopener">Open JSON</a>
+            <a class="panel-link" href="/resources_raw/${SUBJECT_URL}" target="_blank" rel="noopener">Open JSON</a>
           </div>
 
           <div class="rs-toolbar">
@@ -2445,9 +4345,12 @@ STUDY_HTML = r"""
 
     async function loadResourceSections() {
       try {
-        const res = await fetch('/resources_sections/{{ subject_slug }}', { cache: 'no-store' });
-        if (!res.ok) throw new Error('sections failed');
-        const data = await res.json();
+        let data = await fromManifest('resources');
+        if (!data) {
+          const res = await fetch('/resources_sections/' + SUBJECT_URL, { cache: 'no-cache' });
+          if (!res.ok) throw new Error('sections failed');
+          data = await res.json();
+        }
         resSections = Array.isArray(data.sections) ? data.sections : [];
       } catch (e) {
         resSections = [];
@@ -2489,7 +4392,7 @@ STUDY_HTML = r"""
 
       let items = [];
       try {
-        const res = await fetch('/resources_data/{{ subject_slug }}?section=' + encodeURIComponent(section), { cache: 'no-store' });
+        const res = await fetch('/resources_data/' + SUBJECT_URL + '?section=' + encodeURIComponent(section), { cache: 'no-cache' });
         if (!res.ok) throw new Error('data failed');
         const data = await res.json();
         items = Array.isArray(data.items) ? data.items : [];
@@ -2518,7 +4421,7 @@ STUDY_HTML = r"""
         if (hasUrl) {
           link = `<a class="rs-link" href="${escapeHtml(it.url)}" target="_blank" rel="noopener">Open link</a>`;
         } else if (hasFile) {
-          link = `<a class="rs-link" href="/resources_file/{{ subject_slug }}/${encodeURIComponent(it.file)}" target="_blank" rel="noopener">Open file</a>`;
+          link = `<a class="rs-link" href="/resources_file/${SUBJECT_URL}/${encodeURIComponent(it.file)}" target="_blank" rel="noopener">Open file</a>`;
         }
 
         return `
@@ -2552,6 +4455,7 @@ STUDY_HTML = r"""
     // Tool switching
     // -----------------------------
     function selectTool(tool) {
+      activeTool = tool;
       setActiveBtn(tool);
 
       if (tool === 'notes') {
@@ -2583,89 +4487,483 @@ STUDY_HTML = r"""
         </div>
       `;
     }
+
+    loadGuideToc();
   </script>
 </body>
 </html>
 """
 
+# -------- Fingerprinted study page assets --------
+# STUDY_HTML keeps its CSS and JS inline for editing; at import they are moved into
+# content-hashed files under /static/build/ so browsers can cache them forever and
+# only the small HTML shell is fetched per visit.
+
+_BUILD_ASSETS = {}  # filename -> {"body": bytes, "mimetype": str, "etag": str}
+
+
+def _fingerprint_asset(stem: str, ext: str, text: str, mimetype: str):
+    body = text.strip().encode("utf-8")
+    digest = hashlib.sha1(body).hexdigest()
+    filename = f"{stem}.{digest[:12]}.{ext}"
+    _BUILD_ASSETS[filename] = {"body": body, "mimetype": mimetype, "etag": digest}
+    return filename
+
+
+def split_inline_assets(source: str, stem: str):
+    """Replace the inline <style>/<script> blocks of a page template with fingerprinted links."""
+    def asset_link(m, ext, mimetype, tag):
+        text = m.group(1)
+        if "{{" in text or "{%" in text:
+            raise RuntimeError(f"inline {ext} of {stem} must not contain template syntax")
+        filename = _fingerprint_asset(stem, ext, text, mimetype)
+        href = "{{ url_for('build_asset', filename='%s') }}" % filename
+        return tag % href
+
+    out = re.sub(
+        r"<style>(.*?)</style>",
+        lambda m: asset_link(m, "css", "text/css", '<link rel="stylesheet" href="%s">'),
+        source, flags=re.S,
+    )
+    out = re.sub(
+        r"<script>(.*?)</script>",
+        lambda m: asset_link(m, "js", "text/javascript", '<script src="%s"></script>'),
+        out, flags=re.S,
+    )
+    return out
+
+
+# Compiled once at import; render_template accepts Template objects directly.
+LIBRARY_TEMPLATE = app.jinja_env.from_string(LIBRARY_HTML)
+STUDY_TEMPLATE = app.jinja_env.from_string(split_inline_assets(STUDY_HTML, "study"))
+
+# The study page only varies by subject, so each one is rendered once per process.
+_STUDY_PAGE_CACHE = LoaderCache("study_page")  # (subject_slug, has_mindmap) -> {"body": bytes, "etag": str}
+
+
+def render_study_page(subject_slug: str, has_mindmap: bool = False):
+    def build():
+        body = render_template(
+            STUDY_TEMPLATE,
+            subject_slug=subject_slug,
+            display_subject=subject_slug.replace("_", " ").title(),
+            has_mindmap=bool(has_mindmap),
+        ).encode("utf-8")
+        return {"body": body, "etag": hashlib.sha1(body).hexdigest()}
+
+    return _STUDY_PAGE_CACHE.get((subject_slug, bool(has_mindmap)), None, build)
+
+
+# -------- Pre-serialized JSON responses --------
+# Content routes answer from packs the loaders above cache per mtime. The encoded
+# body (JSON, or another generated format such as a combined table's CSV) is kept
+# per request path + query args, tagged with the (path, mtime) of the
+# packs it was built from, so a reparse makes the next hit rebuild it. Entries hold
+# no reference to the packs themselves, which the loader caches can evict freely.
+# Compressed variants are produced on first demand and count towards the budget
+# (STUDY_JSON_RESPONSE_CACHE_MB, plus at most STUDY_JSON_CACHE_SIZE entries).
+
+_JSON_RESPONSE_CACHE = LoaderCache(
+    "json_response", max_entries=int(os.environ.get("STUDY_JSON_CACHE_SIZE", "1024"))
+)  # (path, args) -> {"mtime": source token, "body": bytes, "etag": str, "gzip": bytes, "br": bytes}
+_COMPRESS_MIN_BYTES = 1024
+
+
+def source_token(source):
+    """
+    Version of the loader pack(s) a response is built from: (path, mtime) of each
+    pack, which changes exactly when its loader reparses. A tuple source (several
+    packs feeding one response) gives a tuple of tokens; plain values stand for themselves.
+    """
+    if isinstance(source, tuple):
+        return tuple(source_token(s) for s in source)
+    if isinstance(source, dict):
+        return (source.get("path"), source.get("mtime"))
+    return source
+
+
+def get_response_entry(key, source, build_body):
+    token = source_token(source)
+
+    def build_entry():
+        with timed("serialize"):
+            body = build_body()
+        return {"mtime": token, "body": body, "etag": hashlib.sha1(body).hexdigest()}
+
+    return _JSON_RESPONSE_CACHE.get(key, token, build_entry)
+
+
+def get_json_response_entry(key, source, build):
+    return get_response_entry(key, source, lambda: app.json.response(build()).get_data())
+
+
+def _encoded_body(entry, encoding, cache=None, key=None):
+    body = entry.get(encoding)
+    if body is None:
+        with timed("compress"):
+            if encoding == "br":
+                body = brotli.compress(entry["body"], quality=9)
+            else:
+                body = gzip.compress(entry["body"], compresslevel=6, mtime=0)
+        entry[encoding] = body
+        if cache is not None:
+            cache.charge(key, entry, sys.getsizeof(body))
+    return body
+
+
+def cached_json(source, build):
+    """
+    JSON response for the current request, serialized once per version of its source.
+    `source` is the loader pack (or tuple of packs) the payload comes from and
+    `build()` produces the payload on a miss. Clients revalidate every time and
+    get a 304 while the body is unchanged.
+    """
+    key = (request.path, tuple(sorted(request.args.items(multi=True))))
+    entry = get_json_response_entry(key, source, build)
+    return negotiated_response(entry, "application/json", cache=_JSON_RESPONSE_CACHE, key=key)
+
+
+def cached_body(source, build_body, mimetype: str):
+    """Like cached_json, for a `build_body()` that returns the encoded body itself."""
+    key = (request.path, tuple(sorted(request.args.items(multi=True))))
+    entry = get_response_entry(key, source, build_body)
+    return negotiated_response(entry, mimetype, cache=_JSON_RESPONSE_CACHE, key=key)
+
+
+def _body_response(body, mimetype: str):
+    if not isinstance(body, memoryview):
+        return Response(body, mimetype=mimetype)
+    # A body mapped from the content store: hand it out in chunks rather than
+    # copying it whole into this worker (WSGI servers want bytes, not views).
+    chunks = (bytes(body[i:i + 65536]) for i in range(0, len(body), 65536))
+    resp = Response(chunks, mimetype=mimetype)
+    resp.content_length = len(body)
+    return resp
+
+
+def negotiated_response(entry, mimetype: str, cache=None, key=None, last_modified=None):
+    """
+    Conditional, revalidated response for a {"body", "etag"} entry in the client's
+    preferred encoding. `cache`/`key` name the LoaderCache holding the entry, so
+    compressed variants are charged to its budget; `last_modified` also answers
+    If-Modified-Since.
+    """
+    encoding = None
+    if len(entry["body"]) >= _COMPRESS_MIN_BYTES:
+        accept = request.accept_encodings
+        if brotli is not None and accept["br"]:
+            encoding = "br"
+        elif accept["gzip"]:
+            encoding = "gzip"
+
+    if encoding:
+        resp = _body_response(_encoded_body(entry, encoding, cache, key), mimetype)
+        resp.headers["Content-Encoding"] = encoding
+        resp.set_etag(f'{entry["etag"]}-{encoding}')
+    else:
+        resp = _body_response(entry["body"], mimetype)
+        resp.set_etag(entry["etag"])
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = "no-cache"
+    if last_modified is not None:
+        resp.last_modified = last_modified
+    return resp.make_conditional(request)
+
+
+# -------- Subject manifest --------
+# Everything the study page needs at startup, in one response: which tools have
+# content, their module/section summaries and a version per tool that changes
+# whenever one of its source files does.
+
+def _content_version(*paths):
+    h = hashlib.sha1()
+    found = False
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError):
+            continue
+        found = True
+        h.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()[:16] if found else None
+
+
+def subject_manifest_sources(subject_dir: str):
+    return (
+        get_guide_sections(subject_dir),
+        get_mindmap_tree(subject_dir),
+        get_combined_datatables(subject_dir),
+        get_datatable_listing(subject_dir),
+        get_flashcards(subject_dir),
+        get_quiz(subject_dir),
+        get_resources(subject_dir),
+        _content_version(subject_artifact(subject_dir, "slides")),
+    )
+
+
+def build_subject_manifest(subject_slug: str, subject_dir: str, sources):
+    guide, tree, combined, listing, flashcards, quiz, resources_pack, slides_version = sources
+    tables = datatables_from(combined, listing)
+    resources = resources_pack["resources"]
+    return {
+        "subject": subject_slug,
+        "guide": {
+            "available": bool(guide),
+            "toc": guide["toc"] if guide else [],
+            "version": _content_version(guide["path"]) if guide else None,
+        },
+        "slides": {
+            "available": slides_version is not None,
+            "version": slides_version,
+        },
+        "mindmap": {
+            "available": bool(tree),
+            "version": tree["etag"][:16] if tree else None,
+        },
+        "tables": {
+            "available": bool(tables),
+            "tables": [{"id": t["id"], "name": t["name"]} for t in tables],
+            "version": _content_version(*sorted({t["full"] for t in tables})),
+        },
+        "flashcards": {
+            "available": bool(flashcards["cards"]),
+            "modules": flashcards["modules"],
+            "total": len(flashcards["cards"]),
+            "version": _content_version(subject_artifact(subject_dir, "flashcards")),
+        },
+        "quiz": {
+            "available": bool(quiz["items"]),
+            "modules": quiz["modules"],
+            "total": len(quiz["items"]),
+            "version": _content_version(quiz["path"]),
+        },
+        "resources": {
+            "available": bool(resources),
+            "sections": resource_sections(resources),
+            "version": _content_version(subject_artifact(subject_dir, "resources")),
+        },
+    }
+
+
+# -------- Warm-up / preload --------
+# Caches normally fill on the first request in each worker. preload() fills all of
+# them up front and then gc.freeze()s the heap, so when a pre-forking server
+# (gunicorn --preload) forks, workers start warm and keep sharing those pages
+# copy-on-write. Use `gunicorn --preload 'flask_app:preload_app()'`, or set
+# STUDY_PRELOAD=1 to run it at import. /readyz reports the outcome.
+
+_WARM_STATE = {
+    "required": os.environ.get("STUDY_PRELOAD", "") not in ("", "0"),
+    "warmed": False,
+    "subjects": 0,
+    "seconds": None,
+    "frozen": 0,
+    "errors": {},
+}
+
+
+def warm_subject(subject_dir: str):
+    get_guide_sections(subject_dir)
+    get_guide_doc(subject_dir)
+    get_mindmap_tree(subject_dir)
+    combined = get_combined_datatables(subject_dir)
+    if not (combined and combined.get("tables")):
+        for t in get_datatable_listing(subject_dir)["tables"]:
+            get_table_file(t["full"])
+    get_flashcards(subject_dir)
+    get_quiz(subject_dir)
+    get_resources(subject_dir)
+
+
+def warm_caches():
+    """Run every loader for every subject; a broken subject is logged and skipped."""
+    started = time.perf_counter()
+    subjects = get_catalog()["subjects"]
+    errors = {}
+    for name, subject in subjects.items():
+        try:
+            warm_subject(subject["path"])
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+            app.logger.warning("warm-up failed for %s: %s", name, errors[name])
+    _WARM_STATE.update(
+        warmed=True,
+        subjects=len(subjects) - len(errors),
+        seconds=round(time.perf_counter() - started, 3),
+        errors=errors,
+    )
+    return _WARM_STATE
+
+
+def preload():
+    warm_caches()
+    # Move everything loaded so far out of the collector's reach, so collections in
+    # the workers don't touch (and un-share) these pages.
+    gc.collect()
+    gc.freeze()
+    _WARM_STATE["frozen"] = gc.get_freeze_count()
+    return _WARM_STATE
+
+
+def preload_app():
+    """App factory for pre-forking servers: warm everything, then hand over the app."""
+    _WARM_STATE["required"] = True
+    preload()
+    return app
+
+
 # -----------------------------
 # Routes
 # -----------------------------
+@app.route("/readyz")
+def readyz():
+    # Ready unless a preload was asked for and has not finished yet.
+    state = dict(_WARM_STATE, ready=_WARM_STATE["warmed"] or not _WARM_STATE["required"])
+    resp = app.json.response(state)
+    resp.status_code = 200 if state["ready"] else 503
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@app.route("/metrics")
+def metrics():
+    if not _METRICS_ENABLED:
+        abort(404)
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4", headers={"Cache-Control": "no-store"})
+
+
+@app.route("/cache_stats")
+def cache_stats_view():
+    resp = app.json.response(cache_stats())
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
 @app.route("/")
 def home():
-    books = []
-    for name in sorted(os.listdir(BASE_DIR)):
-        p = os.path.join(BASE_DIR, name)
-        if os.path.isdir(p) and not name.startswith(".") and name not in ("__pycache__", "static"):
-            if os.path.exists(os.path.join(p, "guide.html")):
-                books.append(name)
-    return render_template_string(LIBRARY_HTML, books=books)
+    return render_template(LIBRARY_TEMPLATE, books=get_catalog()["books"])
 
 
 @app.route("/study/<subject>")
 def study(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
+    subject_slug, subject_dir = require_subject(subject)
+    page = render_study_page(subject_slug, has_mindmap=bool(mindmap_path(subject_dir)))
+    resp = Response(page["body"], mimetype="text/html")
+    resp.set_etag(page["etag"])
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+
+@app.route("/subject_manifest/<subject>")
+def subject_manifest(subject):
+    subject_slug, subject_dir = require_subject(subject)
+    sources = subject_manifest_sources(subject_dir)
+    return cached_json(sources, lambda: build_subject_manifest(subject_slug, subject_dir, sources))
+
+
+@app.route("/static/build/<filename>")
+def build_asset(filename):
+    asset = _BUILD_ASSETS.get(filename)
+    if not asset:
         abort(404)
-    display_subject = subject_slug.replace("_", " ").title()
-    return render_template_string(
-        STUDY_HTML,
-        subject_slug=subject_slug,
-        display_subject=display_subject,
-    )
+    resp = Response(asset["body"], mimetype=asset["mimetype"])
+    resp.set_etag(asset["etag"])
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
 
 
 @app.route("/doc/<subject>")
 def serve_doc(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.exists(os.path.join(subject_dir, "guide.html")):
+    subject_slug, subject_dir = require_subject(subject)
+    doc = get_guide_doc(subject_dir)
+    if not doc:
+        abort(404)
+    return negotiated_response(doc, "text/html", cache=_GUIDE_DOC_CACHE, key=doc["path"], last_modified=doc["mtime"])
+
+
+@app.route("/doc_toc/<subject>")
+def doc_toc(subject):
+    subject_slug, subject_dir = require_subject(subject)
+    guide = get_guide_sections(subject_dir)
+    if not guide:
+        abort(404)
+    return cached_json(guide, lambda: {"toc": guide["toc"]})
+
+
+@app.route("/doc_section/<subject>/<int:idx>")
+def doc_section(subject, idx):
+    subject_slug, subject_dir = require_subject(subject)
+    guide = get_guide_sections(subject_dir)
+    if not guide:
         abort(404)
-    return send_from_directory(subject_dir, "guide.html")
+    sections = guide["sections"]
+    if idx >= len(sections):
+        abort(404)
+    section = sections[idx]
+    return cached_json(guide, lambda: {"idx": idx, "title": section["title"], "html": section["html"]})
 
 
 @app.route("/study/<subject>/images/<path:filename>")
 def serve_images(subject, filename):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    images_dir = os.path.join(subject_dir, "images")
-    if not os.path.isdir(images_dir):
+    subject_slug, subject_dir = require_subject(subject)
+    images_dir = subject_artifact(subject_dir, "images")
+    if not images_dir:
         abort(404)
-    return send_from_directory(images_dir, filename)
+    return send_timed(images_dir, filename)
 
 
 @app.route("/slides_pdf/<subject>")
 def serve_slides_pdf(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    path = os.path.join(subject_dir, "slides.pdf")
-    if not os.path.exists(path):
+    subject_slug, subject_dir = require_subject(subject)
+    path = subject_artifact(subject_dir, "slides")
+    if not path:
         abort(404)
-    return send_from_directory(subject_dir, "slides.pdf")
+    return send_timed(subject_dir, "slides.pdf")
 
 
 @app.route("/mindmap_md/<subject>")
 def serve_mindmap_md(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    for fname in ("mindmap.md", "markmap.md"):
-        path = os.path.join(subject_dir, fname)
-        if os.path.exists(path):
-            return send_from_directory(subject_dir, fname)
-    abort(404)
+    subject_slug, subject_dir = require_subject(subject)
+    path = mindmap_path(subject_dir)
+    if not path:
+        abort(404)
+    return send_timed(subject_dir, os.path.basename(path))
+
+
+@app.route("/mindmap_tree/<subject>")
+@app.route("/mindmap_tree/<subject>/<int:node_id>")
+def mindmap_tree(subject, node_id=None):
+    subject_slug, subject_dir = require_subject(subject)
+    tree = get_mindmap_tree(subject_dir)
+    if not tree:
+        abort(404)
+    depth = request.args.get("depth", type=int)
+    if depth is not None and depth < 0:
+        abort(400)
+
+    if node_id is None:
+        build = lambda: {"root": mindmap_subtree(tree["root"], depth)}
+    else:
+        if node_id >= len(tree["nodes"]):
+            abort(404)
+        node = tree["nodes"][node_id]
+        build = lambda: {"id": node_id, "children": [mindmap_subtree(c, depth) for c in node["children"]]}
+
+    return cached_json(tree, build)
 
 
 # ---------- DataTables ----------
 @app.route("/datatable_list/<subject>")
 def datatable_list(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
-    tables = list_datatables(subject_dir)
-    return jsonify({"tables": [{"id": t["id"], "name": t["name"]} for t in tables]})
+    subject_slug, subject_dir = require_subject(subject)
+    combined, listing = get_combined_datatables(subject_dir), get_datatable_listing(subject_dir)
+    tables = datatables_from(combined, listing)
+    return cached_json((combined, listing), lambda: {"tables": [{"id": t["id"], "name": t["name"]} for t in tables]})
 
 
 @app.route("/datatable_raw/<subject>/<table_id>")
 def datatable_raw(subject, table_id):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
+    subject_slug, subject_dir = require_subject(subject)
     if os.path.basename(table_id) != table_id:
         abort(400)
 
@@ -2678,25 +4976,22 @@ def datatable_raw(subject, table_id):
         if not table:
             abort(404)
 
-        csv_text = write_table_to_csv_string(table)
         safe_name = re.sub(r"[^a-zA-Z0-9._ -]+", "_", (table.get("name") or table_id)).strip() or table_id
-        headers = {"Content-Disposition": f'inline; filename="{safe_name}.csv"'}
-        return Response(csv_text, mimetype="text/csv", headers=headers)
+        resp = cached_body(combined, lambda: write_table_to_csv_string(table).encode("utf-8"), "text/csv")
+        resp.headers["Content-Disposition"] = f'inline; filename="{safe_name}.csv"'
+        return resp
 
     # Default: raw file
-    tables = list_datatables(subject_dir)
-    hit = next((t for t in tables if t["id"] == table_id), None)
+    hit = find_flat_datatable(subject_dir, table_id)
     if not hit:
         abort(404)
     folder = os.path.dirname(hit["full"])
-    return send_from_directory(folder, table_id)
+    return send_timed(folder, table_id)
 
 
 @app.route("/datatable_data/<subject>/<table_id>")
 def datatable_data(subject, table_id):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
+    subject_slug, subject_dir = require_subject(subject)
     if os.path.basename(table_id) != table_id:
         abort(400)
 
@@ -2708,131 +5003,139 @@ def datatable_data(subject, table_id):
         table = combined.get("by_id", {}).get(table_id)
         if not table:
             abort(404)
-        return jsonify({"columns": table.get("columns") or [], "rows": table.get("rows") or []})
+        source = combined
+    else:
+        # Default: CSV/JSON file
+        hit = find_flat_datatable(subject_dir, table_id)
+        if not hit:
+            abort(404)
+        table = source = get_table_file(hit["full"])
+    cols, rows = table["columns"], table["rows"]
 
-    # Default: CSV/JSON file
-    tables = list_datatables(subject_dir)
-    hit = next((t for t in tables if t["id"] == table_id), None)
-    if not hit:
-        abort(404)
-    cols, rows = load_table_file(hit["full"])
-    return jsonify({"columns": cols, "rows": rows})
+    # format=compact sends rows as value lists in column order instead of keyed objects.
+    fmt = request.args.get("format", "")
+    if fmt not in ("", "compact"):
+        abort(400)
+
+    # Without query args the whole table is returned, as before.
+    if not any(k in request.args for k in ("q", "sort", "dir", "page", "page_size")):
+        return cached_json(source, lambda: {"columns": cols, "rows": rows if fmt else table_rows_as_dicts(cols, rows)})
+
+    direction = (request.args.get("dir") or "asc").lower()
+    if direction not in ("asc", "desc"):
+        abort(400)
+
+    def build():
+        result = query_table(
+            cols, rows, table["index"],
+            q=request.args.get("q", ""),
+            sort=request.args.get("sort"),
+            direction=direction,
+            page=request.args.get("page", 1, type=int),
+            page_size=request.args.get("page_size", 25, type=int),
+        )
+        if not fmt:
+            result["rows"] = table_rows_as_dicts(cols, result["rows"])
+        return result
+
+    return cached_json(source, build)
 
 
 # ---------- Flashcards ----------
 @app.route("/flashcards_modules/<subject>")
 def flashcards_modules(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
-    cards = load_flashcards(subject_dir)
-    mods = flashcard_modules(cards)
-    return jsonify({"modules": mods, "total": len(cards)})
+    subject_slug, subject_dir = require_subject(subject)
+    pack = get_flashcards(subject_dir)
+    return cached_json(pack, lambda: {"modules": pack["modules"], "total": len(pack["cards"])})
 
 
 @app.route("/flashcards_data/<subject>")
 def flashcards_data(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
+    subject_slug, subject_dir = require_subject(subject)
 
     module = request.args.get("module")
-    all_cards = load_flashcards(subject_dir)
+    pack = get_flashcards(subject_dir)
     if module:
-        filtered = [c for c in all_cards if (c.get("module") or "") == module]
+        filtered = pack["by_module"].get(module, [])
     else:
-        filtered = all_cards
+        filtered = pack["cards"]
 
-    return jsonify({"cards": filtered})
+    return cached_json(pack, lambda: {"cards": filtered})
 
 
 @app.route("/flashcards_raw/<subject>")
 def flashcards_raw(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
-    path = next((p for p in _flashcards_paths(subject_dir) if os.path.exists(p)), None)
+    subject_slug, subject_dir = require_subject(subject)
+    path = subject_artifact(subject_dir, "flashcards")
     if not path:
         abort(404)
     folder = os.path.dirname(path)
     fname = os.path.basename(path)
-    return send_from_directory(folder, fname)
+    return send_timed(folder, fname)
 
 
 # ---------- Quiz ----------
 @app.route("/quiz_modules/<subject>")
 def quiz_modules_route(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
-    items, _ = load_quiz(subject_dir)
-    mods = quiz_modules(items)
-    return jsonify({"modules": mods, "total": len(items)})
+    subject_slug, subject_dir = require_subject(subject)
+    pack = get_quiz(subject_dir)
+    return cached_json(pack, lambda: {"modules": pack["modules"], "total": len(pack["items"])})
 
 
 @app.route("/quiz_data/<subject>")
 def quiz_data(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
+    subject_slug, subject_dir = require_subject(subject)
 
     module = request.args.get("module")
-    items, _ = load_quiz(subject_dir)
+    pack = get_quiz(subject_dir)
     if module:
-        filtered = [q for q in items if (q.get("module") or "") == module]
+        filtered = pack["by_module"].get(module, [])
     else:
-        filtered = items
+        filtered = pack["items"]
 
-    return jsonify({"items": filtered})
+    return cached_json(pack, lambda: {"items": filtered})
 
 
 @app.route("/quiz_raw/<subject>")
 def quiz_raw(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
+    subject_slug, subject_dir = require_subject(subject)
     _, path = load_quiz(subject_dir)
     if not path:
         abort(404)
     folder = os.path.dirname(path)
     fname = os.path.basename(path)
-    return send_from_directory(folder, fname)
+    return send_timed(folder, fname)
 
 
 # ---------- Resources ----------
 @app.route("/resources_sections/<subject>")
 def resources_sections(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
-    resources, _ = load_resources(subject_dir)
-    secs = resource_sections(resources)
-    return jsonify({"sections": secs})
+    subject_slug, subject_dir = require_subject(subject)
+    pack = get_resources(subject_dir)
+    return cached_json(pack, lambda: {"sections": resource_sections(pack["resources"])})
 
 
 @app.route("/resources_data/<subject>")
 def resources_data(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
+    subject_slug, subject_dir = require_subject(subject)
 
     section = (request.args.get("section") or "").strip()
-    resources, _ = load_resources(subject_dir)
+    pack = get_resources(subject_dir)
 
-    items = []
-    for b in resources:
-        if (b.get("section") or "") == section:
-            items = b.get("items") or []
-            break
+    def build():
+        items = []
+        for b in pack["resources"]:
+            if (b.get("section") or "") == section:
+                items = b.get("items") or []
+                break
+        return {"items": items}
 
-    return jsonify({"items": items})
+    return cached_json(pack, build)
 
 
 @app.route("/resources_file/<subject>/<path:filename>")
 def resources_file(subject, filename):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
+    subject_slug, subject_dir = require_subject(subject)
 
     files_dir = os.path.join(subject_dir, "resources", "files")
     if not os.path.isdir(files_dir):
@@ -2863,20 +5166,67 @@ def resources_file(subject, filename):
         abort(404)
 
     # send_from_directory needs directory + relative path
-    return send_from_directory(base_real, clean)
+    return send_timed(base_real, clean)
 
 
 @app.route("/resources_raw/<subject>")
 def resources_raw(subject):
-    subject_slug, subject_dir = resolve_subject_dir(subject)
-    if not os.path.isdir(subject_dir):
-        abort(404)
+    subject_slug, subject_dir = require_subject(subject)
     _, path = load_resources(subject_dir)
     if not path:
         abort(404)
     folder = os.path.dirname(path)
     fname = os.path.basename(path)
-    return send_from_directory(folder, fname)
+    return send_timed(folder, fname)
+
+
+# ---------- CLI ----------
+@app.cli.group("clep")
+def clep_cli():
+    """Study content tools."""
+
+
+@clep_cli.command("build")
+@click.option("--out", "out_dir", default=None,
+              help="Bundle directory (default: $STUDY_BUNDLE_DIR or <BASE_DIR>/.bundles).")
+@click.option("--subject", "names", multiple=True, help="Only build these subjects (repeatable).")
+def clep_build(out_dir, names):
+    """Compile each subject folder into a single .bundle file."""
+    out_dir = out_dir or _BUNDLE_STATE["dir"] or os.path.join(BASE_DIR, ".bundles")
+    for name, payload in _build_payloads(names):
+        path = write_subject_bundle(out_dir, payload)
+        click.echo(f'{name}: {payload["version"]} -> {path}')
+
+
+@clep_cli.command("store")
+@click.option("--out", "out_path", default=None,
+              help="Store file (default: $STUDY_CONTENT_STORE or <BASE_DIR>/.bundles/content.store).")
+@click.option("--subject", "names", multiple=True, help="Only include these subjects (repeatable).")
+def clep_store(out_path, names):
+    """Compile subjects into one memory-mappable content store."""
+    out_path = out_path or _STORE_STATE["path"] or os.path.join(BASE_DIR, ".bundles", "content.store")
+    payloads = []
+    for name, payload in _build_payloads(names):
+        payloads.append(payload)
+        click.echo(f'{name}: {payload["version"]}')
+    write_content_store(out_path, payloads)
+    click.echo(f"-> {out_path}")
+
+
+def _build_payloads(names):
+    # Always build from the source files, whatever this process would serve from.
+    _BUNDLE_STATE["dir"] = None
+    _STORE_STATE["path"] = None
+    subjects = get_catalog()["subjects"]
+    unknown = [n for n in names if n not in subjects]
+    if unknown:
+        raise click.BadParameter(", ".join(unknown), param_hint="--subject")
+    for name in (names or sorted(subjects)):
+        yield name, build_subject_bundle(subjects[name])
+
+
+if _WARM_STATE["required"]:
+    preload()
 
 
 if __name__ == "__main__":